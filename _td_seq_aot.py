@@ -0,0 +1,42 @@
+"""
+Ahead-of-time compilation of the TD Sequential kernels.
+
+Run once after installing the requirements:
+
+    python _td_seq_aot.py
+
+This builds the `_td_seq_native` extension module next to this file.
+calculate_tds.py imports it when available, so a fresh Streamlit process
+does not pay the JIT compilation cost on the first analysis.
+"""
+import os
+
+from numba.pycc import CC
+
+from td_kernels import (
+    COUNTDOWN_STOP_SIG,
+    FORWARD_FILL_SIG,
+    TD_COUNTDOWN_SIG,
+    TD_SEQ_SIG,
+    TDST_STOP_SIG,
+    _countdown_stop_kernel,
+    _forward_fill_kernel,
+    _td_countdown_kernel,
+    _td_seq_kernel,
+    _tdst_stop_kernel,
+)
+
+cc = CC("_td_seq_native")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Every kernel of the single stock pipeline, with the same signatures as
+# their JIT versions in td_kernels
+cc.export("td_seq_kernel", TD_SEQ_SIG)(_td_seq_kernel)
+cc.export("tdst_stop_kernel", TDST_STOP_SIG)(_tdst_stop_kernel)
+cc.export("forward_fill_kernel", FORWARD_FILL_SIG)(_forward_fill_kernel)
+cc.export("td_countdown_kernel", TD_COUNTDOWN_SIG)(_td_countdown_kernel)
+cc.export("countdown_stop_kernel", COUNTDOWN_STOP_SIG)(_countdown_stop_kernel)
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -118,26 +118,29 @@ def apply_simple_strategy(
     # === NEW CODE: Implement position holding until opposite signal ===
     # This applies to all strategy types
 
-    # Initialize columns for position tracking
-    df["Signal"] = 0  # Final signal after position holding logic
-    df["Position"] = 0  # Position based on signals (1 = long, -1 = short/flat)
+    # Position tracking arrays, written by position in the loop and assigned
+    # to the dataframe once, instead of an iloc lookup and write per row
+    raw_signals = df["Raw_Signal"].to_numpy()
+    signal = np.zeros(len(df), dtype=np.int64)  # Final signal after position holding logic
+    position = np.zeros(len(df), dtype=np.int64)  # Position based on signals (1 = long, -1 = short/flat)
 
-    # Loop through the dataframe to implement position holding
+    # Loop through the signals to implement position holding
     # Starting with -1 position (flat/cash) as per requirement
     current_position = -1  # Start with flat position (cash)
 
-    for i in range(len(df)):
-        raw_signal = df.iloc[i]["Raw_Signal"]
-
+    for i, raw_signal in enumerate(raw_signals.tolist()):
         # Only change position when we get an opposite signal or when we have no position
         if (raw_signal == 1 and current_position == -1) or (
             raw_signal == -1 and current_position == 1
         ):
             current_position = raw_signal
-            df.iloc[i, df.columns.get_loc("Signal")] = raw_signal
+            signal[i] = raw_signal
 
         # Update position for this row
-        df.iloc[i, df.columns.get_loc("Position")] = current_position
+        position[i] = current_position
+
+    df["Signal"] = signal
+    df["Position"] = position
 
     # Calculate market returns
     df["Market_Return"] = df["close"].pct_change()  # Market returns
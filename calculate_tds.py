@@ -1,5 +1,42 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Prefer the ahead-of-time compiled kernels, then the JIT ones from td_kernels
+# (which fall back to plain Python when numba is not installed). With the
+# native module td_kernels is not imported at all, so nothing is JIT compiled
+# until a batch calculation needs the parallel kernel
+try:
+    from _td_seq_native import (
+        countdown_stop_kernel,
+        forward_fill_kernel,
+        td_countdown_kernel,
+        td_seq_kernel,
+        tdst_stop_kernel,
+    )
+except ImportError:
+    from td_kernels import (
+        countdown_stop_kernel,
+        forward_fill_kernel,
+        td_countdown_kernel,
+        td_seq_kernel,
+        tdst_stop_kernel,
+    )
+
+# Setup and countdown counters never exceed 13 and price levels are copied
+# from (or derived from) float32 prices, so the results are stored compactly
+RESULT_DTYPES = {
+    "buy_setup": np.int8,
+    "sell_setup": np.int8,
+    "buy_countdown": np.int8,
+    "sell_countdown": np.int8,
+    "buy_tdst_level": np.float32,
+    "sell_tdst_level": np.float32,
+    "buy_setup_stop": np.float32,
+    "sell_setup_stop": np.float32,
+    "buy_countdown_stop": np.float32,
+    "sell_countdown_stop": np.float32,
+}
 
 
 def calculate_tdsequential(df, stock_name="AAPL"):
@@ -24,35 +61,108 @@ def calculate_tdsequential(df, stock_name="AAPL"):
 
     # Standardize and validate input data
     df = _preprocess_dataframe(df)
+    td = _td_buffers(len(df))
 
     # Calculate setup phases (buy and sell)
-    df = _calculate_setup_phases(df)
+    _calculate_setup_phases(df, td)
+
+    return _calculate_levels_and_countdowns(df, td, stock_name)
+
+
+def calculate_tdsequential_batch(dfs, parallel=False):
+    """
+    Calculate TD Sequential indicators for several stocks at once.
+    The setup phases of all stocks are counted one stock after the other with
+    the single stock kernel, or in a single parallel kernel call when
+    parallel is True. The Streamlit app always counts them serially, it never
+    runs the parallel kernel.
+
+    Parameters:
+    -----------
+    dfs : dict
+        Mapping of stock name to DataFrame with OHLC data
+    parallel : bool, optional
+        Count the setup phases with the parallel kernel, default is False.
+        Only pass True from the main thread: started from any other thread
+        (e.g. Streamlit's script thread), numba's threading layer keeps the
+        process from exiting
+
+    Returns:
+    --------
+    dict
+        Mapping of stock name to DataFrame with TD Sequential indicators added
+    """
+    # Standardize and validate every input dataframe
+    frames = {name: _preprocess_dataframe(df.copy()) for name, df in dfs.items()}
+    if not frames:
+        return {}
+
+    # Stack the close prices into a padded (n_stocks, max_n) array
+    n_bars = np.array([len(df) for df in frames.values()], dtype=np.int64)
+    closes = np.zeros((len(frames), n_bars.max()), dtype=np.float32)
+    for row, df in enumerate(frames.values()):
+        closes[row, : len(df)] = df["close"].to_numpy(dtype=np.float32)
+
+    # Calculate setup phases (buy and sell) for all stocks, in parallel or
+    # one stock after the other with the single stock kernel
+    buy_setups = np.zeros(closes.shape, dtype=np.int64)
+    sell_setups = np.zeros(closes.shape, dtype=np.int64)
+    if parallel:
+        from td_kernels import td_seq_batch
+
+        td_seq_batch(closes, n_bars, buy_setups, sell_setups)
+    else:
+        for row, n in enumerate(n_bars):
+            td_seq_kernel(closes[row, :n], buy_setups[row, :n], sell_setups[row, :n])
+
+    results = {}
+    for row, (name, df) in enumerate(frames.items()):
+        td = _td_buffers(len(df))
+        td["buy_setup"] = buy_setups[row, : len(df)]
+        td["sell_setup"] = sell_setups[row, : len(df)]
+        results[name] = _calculate_levels_and_countdowns(df, td, stock_name=name)
+
+    return results
+
+
+def _calculate_levels_and_countdowns(df, td, stock_name):
+    """
+    Calculate the TD Sequential phases that follow the setup phases and
+    attach all result columns to the dataframe.
+    """
+    prices = _price_arrays(df)
 
     # Calculate TDST levels and setup stop loss levels
-    df = _calculate_tdst_and_stop_levels(df)
+    _calculate_tdst_and_stop_levels(prices, td)
 
     # Forward fill TDST levels and stop levels until cancellation or new setup
-    df = _forward_fill_levels(df)
+    _forward_fill_levels(prices, td)
 
     # Identify perfect 9 setups
-    df = _identify_perfect_setups(df)
+    _identify_perfect_setups(prices, td)
 
     # Calculate countdown phases (buy and sell) and countdown stop levels
-    df = _calculate_countdown_phases(df)
+    _calculate_countdown_phases(prices, td)
 
     # Identify stop loss triggers and reactivations
-    df = _identify_stop_events(df)
+    _identify_stop_events(td)
 
-    # Clean up intermediate columns
-    df = df.drop(
-        ["close_4_periods_ago", "buy_setup_condition", "sell_setup_condition"], axis=1
-    )
+    # Downcast the counters and levels once all phases are calculated
+    columns = {
+        col: values.astype(RESULT_DTYPES.get(col, values.dtype), copy=False)
+        for col, values in td.items()
+    }
 
     # Add stock name if provided
     if stock_name:
-        df["stock_name"] = stock_name
+        columns["stock_name"] = stock_name
 
-    return df
+    # Attach every result column in one step. Inserting them one at a time
+    # rebuilds the dataframe's internal blocks on each insert
+    results = pd.DataFrame(columns, index=df.index, copy=False)
+    return pd.concat(
+        [df.drop(columns=results.columns, errors="ignore"), results], axis=1
+    )
 
 
 def _preprocess_dataframe(df):
@@ -60,7 +170,7 @@ def _preprocess_dataframe(df):
     Standardize and validate the input dataframe.
     """
     # Ensure columns are lowercase
-    df.columns = [col.lower() for col in df.columns]
+    df.columns = df.columns.str.lower()
 
     # Check for required columns
     required_cols = ["open", "high", "low", "close"]
@@ -72,992 +182,330 @@ def _preprocess_dataframe(df):
     if "date" in df.columns and not isinstance(df.index, pd.DatetimeIndex):
         df = df.set_index("date")
 
-    # Calculate Close 4 periods ago (for setup phase)
-    df["close_4_periods_ago"] = df["close"].shift(4)
-
-    # Buy Setup: Current close less than close 4 bars earlier
-    df["buy_setup_condition"] = df["close"] < df["close_4_periods_ago"]
-
-    # Sell Setup: Current close greater than close 4 bars earlier
-    df["sell_setup_condition"] = df["close"] > df["close_4_periods_ago"]
-
-    # Initialize setup counters
-    df["buy_setup"] = 0
-    df["sell_setup"] = 0
-
-    # Initialize TDST level columns
-    df["buy_tdst_level"] = np.nan
-    df["sell_tdst_level"] = np.nan
-    df["buy_tdst_active"] = False
-    df["sell_tdst_active"] = False
-
-    # Initialize Setup Stop Loss columns
-    df["buy_setup_stop"] = np.nan
-    df["sell_setup_stop"] = np.nan
-    df["buy_setup_stop_active"] = False
-    df["sell_setup_stop_active"] = False
-
-    # Initialize Countdown Stop Loss columns
-    df["buy_countdown_stop"] = np.nan
-    df["sell_countdown_stop"] = np.nan
-    df["buy_countdown_stop_active"] = False
-    df["sell_countdown_stop_active"] = False
-
-    # Initialize countdown columns
-    df["buy_countdown"] = 0
-    df["sell_countdown"] = 0
-    df["buy_countdown_active"] = 0
-    df["sell_countdown_active"] = 0
-    df["perfect_buy_13"] = 0
-    df["perfect_sell_13"] = 0
-
-    # Initialize perfect setup columns
-    df["perfect_buy_9"] = 0
-    df["perfect_sell_9"] = 0
-
-    # Initialize stop loss event columns
-    df["buy_stop_triggered"] = False
-    df["sell_stop_triggered"] = False
-    df["buy_stop_reactivated"] = False
-    df["sell_stop_reactivated"] = False
-    
-    # Initialize countdown stop loss event columns
-    df["buy_countdown_stop_triggered"] = False
-    df["sell_countdown_stop_triggered"] = False
-    df["buy_countdown_stop_reactivated"] = False
-    df["sell_countdown_stop_reactivated"] = False
-
     return df
 
 
-def _calculate_setup_phases(df):
+def _td_buffers(n):
+    """
+    Allocate the TD Sequential result columns as NumPy arrays, in output
+    column order. The calculation phases fill them in place.
+    """
+
+    def counter():
+        return np.zeros(n, dtype=np.int64)
+
+    def level():
+        return np.full(n, np.nan)
+
+    def flag():
+        return np.zeros(n, dtype=bool)
+
+    return {
+        # Setup counters
+        "buy_setup": counter(),
+        "sell_setup": counter(),
+        # TDST level columns
+        "buy_tdst_level": level(),
+        "sell_tdst_level": level(),
+        "buy_tdst_active": flag(),
+        "sell_tdst_active": flag(),
+        # Setup Stop Loss columns
+        "buy_setup_stop": level(),
+        "sell_setup_stop": level(),
+        "buy_setup_stop_active": flag(),
+        "sell_setup_stop_active": flag(),
+        # Countdown Stop Loss columns
+        "buy_countdown_stop": level(),
+        "sell_countdown_stop": level(),
+        "buy_countdown_stop_active": flag(),
+        "sell_countdown_stop_active": flag(),
+        # Countdown columns
+        "buy_countdown": counter(),
+        "sell_countdown": counter(),
+        "buy_countdown_active": counter(),
+        "sell_countdown_active": counter(),
+        "perfect_buy_13": counter(),
+        "perfect_sell_13": counter(),
+        # Perfect setup columns
+        "perfect_buy_9": counter(),
+        "perfect_sell_9": counter(),
+        # Stop loss event columns
+        "buy_stop_triggered": flag(),
+        "sell_stop_triggered": flag(),
+        "buy_stop_reactivated": flag(),
+        "sell_stop_reactivated": flag(),
+        # Countdown stop loss event columns
+        "buy_countdown_stop_triggered": flag(),
+        "sell_countdown_stop_triggered": flag(),
+        "buy_countdown_stop_reactivated": flag(),
+        "sell_countdown_stop_reactivated": flag(),
+    }
+
+
+def _price_arrays(df):
+    """
+    Return the high, low and close prices as float64 NumPy arrays.
     """
-    Calculate Buy and Sell Setup phases.
-    """
-    for i in range(1, len(df)):
-        # Buy Setup
-        if df["buy_setup_condition"].iloc[i]:
-            # Continue counting if previous bar was also part of buy setup
-            if df["buy_setup"].iloc[i - 1] > 0 and df["buy_setup"].iloc[i - 1] < 9:
-                df.loc[df.index[i], "buy_setup"] = df["buy_setup"].iloc[i - 1] + 1
-            # Start a new count
-            else:
-                df.loc[df.index[i], "buy_setup"] = 1
-        # Reset if condition not met
-        else:
-            df.loc[df.index[i], "buy_setup"] = 0
-
-        # Sell Setup
-        if df["sell_setup_condition"].iloc[i]:
-            # Continue counting if previous bar was also part of sell setup
-            if df["sell_setup"].iloc[i - 1] > 0 and df["sell_setup"].iloc[i - 1] < 9:
-                df.loc[df.index[i], "sell_setup"] = df["sell_setup"].iloc[i - 1] + 1
-            # Start a new count
-            else:
-                df.loc[df.index[i], "sell_setup"] = 1
-        # Reset if condition not met
-        else:
-            df.loc[df.index[i], "sell_setup"] = 0
-
-    return df
+    return (
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+    )
 
 
-def _calculate_tdst_and_stop_levels(df):
+def _setup_levels(high, low, buy_setup, sell_setup):
     """
-    Calculate TDST levels and setup stop loss levels when setups complete.
+    TDST and stop levels of the setups completing (count 9) on each bar,
+    from the 9 bars of the setup. NaN on other bars.
+
+    Returns buy TDST (highest high), sell TDST (lowest low), buy stop (lowest
+    low minus the range of that bar) and sell stop (highest high plus the
+    range of that bar).
     """
-    # Track current active TDST levels and stop levels
-    current_buy_tdst = None
-    current_sell_tdst = None
-    current_buy_stop = None
-    current_sell_stop = None
-
-    # Track inactive stop levels for potential reactivation
-    inactive_buy_stop = None
-    inactive_sell_stop = None
-
-    # Flag to track if stops have been triggered
-    buy_stop_triggered = False
-    sell_stop_triggered = False
-
-    for i in range(1, len(df)):
-        # Check for TDST cancellation conditions before processing new setups
-        if current_buy_tdst is not None and df["close"].iloc[i] > current_buy_tdst:
-            current_buy_tdst = None
-            df.loc[df.index[i], "buy_tdst_active"] = False
-
-        if current_sell_tdst is not None and df["close"].iloc[i] < current_sell_tdst:
-            current_sell_tdst = None
-            df.loc[df.index[i], "sell_tdst_active"] = False
-
-        # Check for stop loss cancellation conditions
-        if current_buy_stop is not None and df["low"].iloc[i] <= current_buy_stop:
-            inactive_buy_stop = current_buy_stop  # Store for potential reactivation
-            current_buy_stop = None
-            df.loc[df.index[i], "buy_setup_stop_active"] = False
-            buy_stop_triggered = True
-
-        if current_sell_stop is not None and df["high"].iloc[i] >= current_sell_stop:
-            inactive_sell_stop = current_sell_stop  # Store for potential reactivation
-            current_sell_stop = None
-            df.loc[df.index[i], "sell_setup_stop_active"] = False
-            sell_stop_triggered = True
-
-        # Check for stop loss reactivation conditions
-        if (
-            inactive_buy_stop is not None
-            and buy_stop_triggered
-            and df["low"].iloc[i] > inactive_buy_stop
-        ):
-            current_buy_stop = inactive_buy_stop
-            df.loc[df.index[i], "buy_setup_stop"] = current_buy_stop
-            df.loc[df.index[i], "buy_setup_stop_active"] = True
-            inactive_buy_stop = None
-            buy_stop_triggered = False
-
-        if (
-            inactive_sell_stop is not None
-            and sell_stop_triggered
-            and df["high"].iloc[i] < inactive_sell_stop
-        ):
-            current_sell_stop = inactive_sell_stop
-            df.loc[df.index[i], "sell_setup_stop"] = current_sell_stop
-            df.loc[df.index[i], "sell_setup_stop_active"] = True
-            inactive_sell_stop = None
-            sell_stop_triggered = False
-
-        # Calculate new levels when setup completes
-        if df["buy_setup"].iloc[i] == 9:
-            setup_start = max(0, i - 8)
-            setup_bars = df.iloc[setup_start : i + 1]
-
-            # TDST for buy setup is the highest high of the setup
-            current_buy_tdst = setup_bars["high"].max()
-            df.loc[df.index[i], "buy_tdst_level"] = current_buy_tdst
-            df.loc[df.index[i], "buy_tdst_active"] = True
-
-            # Calculate buy setup stop level
-            current_buy_stop = _calculate_buy_stop_level(setup_bars)
-            df.loc[df.index[i], "buy_setup_stop"] = current_buy_stop
-            df.loc[df.index[i], "buy_setup_stop_active"] = True
-
-            # Reset inactive stops and trigger flags when new setup completes
-            inactive_buy_stop = None
-            buy_stop_triggered = False
-
-        if df["sell_setup"].iloc[i] == 9:
-            setup_start = max(0, i - 8)
-            setup_bars = df.iloc[setup_start : i + 1]
-
-            # TDST for sell setup is the lowest low of the setup
-            current_sell_tdst = setup_bars["low"].min()
-            df.loc[df.index[i], "sell_tdst_level"] = current_sell_tdst
-            df.loc[df.index[i], "sell_tdst_active"] = True
-
-            # Calculate sell setup stop level
-            current_sell_stop = _calculate_sell_stop_level(setup_bars)
-            df.loc[df.index[i], "sell_setup_stop"] = current_sell_stop
-            df.loc[df.index[i], "sell_setup_stop_active"] = True
-
-            # Reset inactive stops and trigger flags when new setup completes
-            inactive_sell_stop = None
-            sell_stop_triggered = False
+    buy_tdst, sell_tdst, buy_stop, sell_stop = np.full((4, len(high)), np.nan)
 
-    return df
+    # Positions of the first bar of each completed setup. Setups complete at
+    # the earliest on bar 13, so every setup has all of its 9 bars
+    starts = np.flatnonzero((buy_setup == 9) | (sell_setup == 9)) - 8
+    if len(starts):
+        # Bars making the extremes of each setup, the first one on ties
+        highest = starts + sliding_window_view(high, 9)[starts].argmax(axis=1)
+        lowest = starts + sliding_window_view(low, 9)[starts].argmin(axis=1)
 
+        ends = starts + 8
+        buy_tdst[ends] = high[highest]
+        sell_tdst[ends] = low[lowest]
+        buy_stop[ends] = low[lowest] - (high[lowest] - low[lowest])
+        sell_stop[ends] = high[highest] + (high[highest] - low[highest])
 
-def _calculate_buy_stop_level(setup_bars):
+    return buy_tdst, sell_tdst, buy_stop, sell_stop
+
+
+def _kernel_buffers(td, columns):
     """
-    Calculate buy setup stop level: lowest low minus the range of the lowest bar.
+    Result arrays in kernel argument order, which the kernels write in place.
     """
-    # Original buy setup stop is the lowest low of the setup
-    buy_stop = setup_bars["low"].min()
-
-    # Find the bar with the lowest low in the setup
-    min_low_bar = setup_bars[setup_bars["low"] == buy_stop].iloc[0]
-    
-    # Calculate the range (high - low) of that bar
-    bar_range = min_low_bar["high"] - min_low_bar["low"]
-    
-    # Subtract this range from the original stop level
-    return buy_stop - bar_range
+    return [td[col] for col in columns]
 
 
-def _calculate_sell_stop_level(setup_bars):
+def _calculate_setup_phases(df, td):
     """
-    Calculate sell setup stop level: highest high plus the range of the highest bar.
+    Calculate Buy and Sell Setup phases.
     """
-    # Original sell setup stop is the highest high of the setup
-    sell_stop = setup_bars["high"].max()
-
-    # Find the bar with the highest high in the setup
-    max_high_bar = setup_bars[setup_bars["high"] == sell_stop].iloc[0]
-    
-    # Calculate the range (high - low) of that bar
-    bar_range = max_high_bar["high"] - max_high_bar["low"]
-    
-    # Add this range to the original stop level
-    return sell_stop + bar_range
+    # Prices are only compared with each other, float32 is precise enough
+    # and halves the memory traffic through the kernel
+    td_seq_kernel(
+        df["close"].to_numpy(dtype=np.float32), td["buy_setup"], td["sell_setup"]
+    )
 
 
-def _forward_fill_levels(df):
+def _calculate_tdst_and_stop_levels(prices, td):
     """
-    Forward fill TDST levels and stop levels until cancellation or new setup.
+    Calculate TDST levels and setup stop loss levels when setups complete.
     """
-    buy_tdst_active = False
-    sell_tdst_active = False
-    buy_stop_active = False
-    sell_stop_active = False
-    buy_countdown_stop_active = False
-    sell_countdown_stop_active = False
-    
-    last_buy_tdst = None
-    last_sell_tdst = None
-    last_buy_stop = None
-    last_sell_stop = None
-    last_buy_countdown_stop = None
-    last_sell_countdown_stop = None
-
-    # Track inactive stop levels for potential reactivation in forward fill
-    inactive_buy_stop_ff = None
-    inactive_sell_stop_ff = None
-    inactive_buy_countdown_stop_ff = None
-    inactive_sell_countdown_stop_ff = None
-    
-    buy_stop_triggered_ff = False
-    sell_stop_triggered_ff = False
-    buy_countdown_stop_triggered_ff = False
-    sell_countdown_stop_triggered_ff = False
-
-    for i in range(len(df)):
-        # Check for new TDST levels
-        if not pd.isna(df["buy_tdst_level"].iloc[i]):
-            buy_tdst_active = True
-            last_buy_tdst = df["buy_tdst_level"].iloc[i]
-
-        if not pd.isna(df["buy_setup_stop"].iloc[i]):
-            buy_stop_active = True
-            last_buy_stop = df["buy_setup_stop"].iloc[i]
-            # Reset reactivation data when new stop is set
-            inactive_buy_stop_ff = None
-            buy_stop_triggered_ff = False
-
-        if not pd.isna(df["sell_tdst_level"].iloc[i]):
-            sell_tdst_active = True
-            last_sell_tdst = df["sell_tdst_level"].iloc[i]
-
-        if not pd.isna(df["sell_setup_stop"].iloc[i]):
-            sell_stop_active = True
-            last_sell_stop = df["sell_setup_stop"].iloc[i]
-            # Reset reactivation data when new stop is set
-            inactive_sell_stop_ff = None
-            sell_stop_triggered_ff = False
-            
-        # Check for new countdown stop levels
-        if not pd.isna(df["buy_countdown_stop"].iloc[i]):
-            buy_countdown_stop_active = True
-            last_buy_countdown_stop = df["buy_countdown_stop"].iloc[i]
-            # Reset reactivation data when new stop is set
-            inactive_buy_countdown_stop_ff = None
-            buy_countdown_stop_triggered_ff = False
-
-        if not pd.isna(df["sell_countdown_stop"].iloc[i]):
-            sell_countdown_stop_active = True
-            last_sell_countdown_stop = df["sell_countdown_stop"].iloc[i]
-            # Reset reactivation data when new stop is set
-            inactive_sell_countdown_stop_ff = None
-            sell_countdown_stop_triggered_ff = False
-
-        # Handle TDST cancellations
-        if buy_tdst_active and df["close"].iloc[i] > last_buy_tdst:
-            buy_tdst_active = False
-            df.loc[df.index[i], "buy_tdst_active"] = False
-
-        if sell_tdst_active and df["close"].iloc[i] < last_sell_tdst:
-            sell_tdst_active = False
-            df.loc[df.index[i], "sell_tdst_active"] = False
-
-        # Handle setup stop loss cancellations
-        if buy_stop_active and df["low"].iloc[i] <= last_buy_stop:
-            buy_stop_active = False
-            df.loc[df.index[i], "buy_setup_stop_active"] = False
-            inactive_buy_stop_ff = last_buy_stop  # Store for potential reactivation
-            buy_stop_triggered_ff = True
-
-        if sell_stop_active and df["high"].iloc[i] >= last_sell_stop:
-            sell_stop_active = False
-            df.loc[df.index[i], "sell_setup_stop_active"] = False
-            inactive_sell_stop_ff = last_sell_stop  # Store for potential reactivation
-            sell_stop_triggered_ff = True
-            
-        # Handle countdown stop loss cancellations
-        if buy_countdown_stop_active and df["low"].iloc[i] <= last_buy_countdown_stop:
-            buy_countdown_stop_active = False
-            df.loc[df.index[i], "buy_countdown_stop_active"] = False
-            inactive_buy_countdown_stop_ff = last_buy_countdown_stop  # Store for potential reactivation
-            buy_countdown_stop_triggered_ff = True
-
-        if sell_countdown_stop_active and df["high"].iloc[i] >= last_sell_countdown_stop:
-            sell_countdown_stop_active = False
-            df.loc[df.index[i], "sell_countdown_stop_active"] = False
-            inactive_sell_countdown_stop_ff = last_sell_countdown_stop  # Store for potential reactivation
-            sell_countdown_stop_triggered_ff = True
-
-        # Handle setup stop loss reactivation
-        if (
-            inactive_buy_stop_ff is not None
-            and buy_stop_triggered_ff
-            and df["low"].iloc[i] > inactive_buy_stop_ff
-        ):
-            buy_stop_active = True
-            last_buy_stop = inactive_buy_stop_ff
-            df.loc[df.index[i], "buy_setup_stop"] = last_buy_stop
-            df.loc[df.index[i], "buy_setup_stop_active"] = True
-            inactive_buy_stop_ff = None
-            buy_stop_triggered_ff = False
-
-        if (
-            inactive_sell_stop_ff is not None
-            and sell_stop_triggered_ff
-            and df["high"].iloc[i] < inactive_sell_stop_ff
-        ):
-            sell_stop_active = True
-            last_sell_stop = inactive_sell_stop_ff
-            df.loc[df.index[i], "sell_setup_stop"] = last_sell_stop
-            df.loc[df.index[i], "sell_setup_stop_active"] = True
-            inactive_sell_stop_ff = None
-            sell_stop_triggered_ff = False
-            
-        # Handle countdown stop loss reactivation
-        if (
-            inactive_buy_countdown_stop_ff is not None
-            and buy_countdown_stop_triggered_ff
-            and df["low"].iloc[i] > inactive_buy_countdown_stop_ff
-        ):
-            buy_countdown_stop_active = True
-            last_buy_countdown_stop = inactive_buy_countdown_stop_ff
-            df.loc[df.index[i], "buy_countdown_stop"] = last_buy_countdown_stop
-            df.loc[df.index[i], "buy_countdown_stop_active"] = True
-            df.loc[df.index[i], "buy_countdown_stop_reactivated"] = True
-            inactive_buy_countdown_stop_ff = None
-            buy_countdown_stop_triggered_ff = False
-
-        if (
-            inactive_sell_countdown_stop_ff is not None
-            and sell_countdown_stop_triggered_ff
-            and df["high"].iloc[i] < inactive_sell_countdown_stop_ff
-        ):
-            sell_countdown_stop_active = True
-            last_sell_countdown_stop = inactive_sell_countdown_stop_ff
-            df.loc[df.index[i], "sell_countdown_stop"] = last_sell_countdown_stop
-            df.loc[df.index[i], "sell_countdown_stop_active"] = True
-            df.loc[df.index[i], "sell_countdown_stop_reactivated"] = True
-            inactive_sell_countdown_stop_ff = None
-            sell_countdown_stop_triggered_ff = False
-
-        # Forward fill active TDST levels
-        if buy_tdst_active:
-            df.loc[df.index[i], "buy_tdst_level"] = last_buy_tdst
-            df.loc[df.index[i], "buy_tdst_active"] = True
-
-        if sell_tdst_active:
-            df.loc[df.index[i], "sell_tdst_level"] = last_sell_tdst
-            df.loc[df.index[i], "sell_tdst_active"] = True
-
-        # Forward fill active setup stop levels
-        if buy_stop_active:
-            df.loc[df.index[i], "buy_setup_stop"] = last_buy_stop
-            df.loc[df.index[i], "buy_setup_stop_active"] = True
-
-        if sell_stop_active:
-            df.loc[df.index[i], "sell_setup_stop"] = last_sell_stop
-            df.loc[df.index[i], "sell_setup_stop_active"] = True
-            
-        # Forward fill active countdown stop levels
-        if buy_countdown_stop_active:
-            df.loc[df.index[i], "buy_countdown_stop"] = last_buy_countdown_stop
-            df.loc[df.index[i], "buy_countdown_stop_active"] = True
-
-        if sell_countdown_stop_active:
-            df.loc[df.index[i], "sell_countdown_stop"] = last_sell_countdown_stop
-            df.loc[df.index[i], "sell_countdown_stop_active"] = True
+    high, low, close = prices
+    buy_setup = td["buy_setup"]
+    sell_setup = td["sell_setup"]
+
+    # Output columns in kernel argument order
+    outputs = _kernel_buffers(
+        td,
+        (
+            "buy_tdst_level",
+            "sell_tdst_level",
+            "buy_tdst_active",
+            "sell_tdst_active",
+            "buy_setup_stop",
+            "sell_setup_stop",
+            "buy_setup_stop_active",
+            "sell_setup_stop_active",
+        ),
+    )
 
-    return df
+    # Run the level state machine in the compiled kernel
+    tdst_stop_kernel(
+        high,
+        low,
+        close,
+        buy_setup,
+        sell_setup,
+        *_setup_levels(high, low, buy_setup, sell_setup),
+        *outputs,
+    )
 
 
-def _identify_perfect_setups(df):
+def _forward_fill_levels(prices, td):
     """
-    Identify perfect 9 setups for both buy and sell.
+    Forward fill TDST levels and stop levels until cancellation or new setup.
     """
-    for i in range(2, len(df)):
-        if df["buy_setup"].iloc[i] == 9:
-            # Perfect Buy 9: Low of bar 9 < Low of bar 6
-            if df["low"].iloc[i] < df["low"].iloc[i - 3]:
-                df.loc[df.index[i], "perfect_buy_9"] = 1
+    # Level columns in kernel argument order
+    outputs = _kernel_buffers(
+        td,
+        (
+            "buy_tdst_level",
+            "sell_tdst_level",
+            "buy_tdst_active",
+            "sell_tdst_active",
+            "buy_setup_stop",
+            "sell_setup_stop",
+            "buy_setup_stop_active",
+            "sell_setup_stop_active",
+            "buy_countdown_stop",
+            "sell_countdown_stop",
+            "buy_countdown_stop_active",
+            "sell_countdown_stop_active",
+            "buy_countdown_stop_reactivated",
+            "sell_countdown_stop_reactivated",
+        ),
+    )
 
-        if df["sell_setup"].iloc[i] == 9:
-            # Perfect Sell 9: High of bar 9 > High of bar 6
-            if df["high"].iloc[i] > df["high"].iloc[i - 3]:
-                df.loc[df.index[i], "perfect_sell_9"] = 1
+    # Run the forward fill state machine in the compiled kernel
+    forward_fill_kernel(*prices, *outputs)
 
-    return df
 
-def _calculate_countdown_phases(df):
+def _identify_perfect_setups(prices, td):
     """
-    Calculate TD Sequential countdown phases for both buy and sell.
-    Handles countdown progression, completion, and stop level management.
-    
-    Parameters:
-    -----------
-    df : pandas.DataFrame
-        DataFrame with OHLC data
-        
-    Returns:
-    --------
-    pandas.DataFrame
-        DataFrame with countdown indicators and stop levels added
+    Identify perfect 9 setups for both buy and sell.
     """
-    # Store indices of setup and countdown bars
-    buy_countdown_bars = []
-    sell_countdown_bars = []
-
-    # Track active countdowns
-    buy_countdown_active = False
-    sell_countdown_active = False
-
-    # Setup that initiated current countdown
-    current_buy_setup_idx = None
-    current_sell_setup_idx = None
-
-    # TDST levels for buy and sell countdowns
-    buy_tdst_level = None
-    sell_tdst_level = None
-    
-    # Track all countdown completions for stop level management
-    buy_completions = []
-    sell_completions = []
-    
-    # First pass - Calculate countdown values
-    for i in range(9, len(df)):
-        # Process buy side setup completion
-        if df["buy_setup"].iloc[i] == 9:
-            # Only reset if not already active or reset sell countdown
-            if not buy_countdown_active:
-                buy_countdown_active = True
-                buy_countdown_bars = []
-                current_buy_setup_idx = i
-                df.loc[df.index[i], "buy_countdown_active"] = 1
-            
-            # If sell countdown is active, reset it
-            if sell_countdown_active:
-                sell_countdown_active = False
-                sell_countdown_bars = []
-                current_sell_setup_idx = None
-                sell_tdst_level = None
-                df.loc[df.index[i], "sell_countdown_active"] = 0
-                df.loc[df.index[i], "sell_countdown"] = 0
-            
-            # Set TDST level for buy countdown (highest high of the buy setup)
-            buy_tdst_level = df["high"].iloc[i - 8 : i + 1].max()
-
-        # Process sell side setup completion
-        if df["sell_setup"].iloc[i] == 9:
-            # Only reset if not already active or reset buy countdown
-            if not sell_countdown_active:
-                sell_countdown_active = True
-                sell_countdown_bars = []
-                current_sell_setup_idx = i
-                df.loc[df.index[i], "sell_countdown_active"] = 1
-            
-            # If buy countdown is active, reset it
-            if buy_countdown_active:
-                buy_countdown_active = False
-                buy_countdown_bars = []
-                current_buy_setup_idx = None
-                buy_tdst_level = None
-                df.loc[df.index[i], "buy_countdown_active"] = 0
-                df.loc[df.index[i], "buy_countdown"] = 0
-            
-            # Set TDST level for sell countdown (lowest low of the sell setup)
-            sell_tdst_level = df["low"].iloc[i - 8 : i + 1].min()
-
-        # Process Buy Countdown
-        if buy_countdown_active:
-            # Mark countdown as active in dataframe
-            df.loc[df.index[i], "buy_countdown_active"] = 1
-
-            # Check for countdown cancel condition (close above TDST)
-            if buy_tdst_level is not None and df["close"].iloc[i] > buy_tdst_level:
-                # Cancel the buy countdown
-                buy_countdown_active = False
-                buy_countdown_bars = []
-                df.loc[df.index[i], "buy_countdown"] = 0
-                continue
-
-            # Check for countdown qualifying bar: Close <= Low of 2 bars earlier
-            if i >= 2 and df["close"].iloc[i] <= df["low"].iloc[i - 2]:
-                # Add this bar to qualifying bars
-                buy_countdown_bars.append(i)
-
-                # Update countdown count
-                current_count = len(buy_countdown_bars)
-                df.loc[df.index[i], "buy_countdown"] = current_count
-
-                # Check for countdown completion at 13
-                if current_count == 13:
-                    # Store information about this completion
-                    buy_completions.append({
-                        "index": i,
-                        "bars": buy_countdown_bars.copy(),
-                        "perfect": False
-                    })
-                    
-                    # Check for perfect 13
-                    if len(buy_countdown_bars) >= 8:
-                        bar_8_idx = buy_countdown_bars[7]  # 8th bar (0-indexed)
-                        # Perfect Buy 13: Close of bar 13 ≤ Low of bar 8
-                        if df["close"].iloc[i] <= df["low"].iloc[bar_8_idx]:
-                            df.loc[df.index[i], "perfect_buy_13"] = 1
-                            buy_completions[-1]["perfect"] = True
-                    
-                    # Reset countdown after reaching 13
-                    buy_countdown_active = False
-            else:
-                # Bar doesn't qualify, but countdown continues
-                # Keep the previous countdown value
-                if buy_countdown_bars:
-                    df.loc[df.index[i], "buy_countdown"] = len(buy_countdown_bars)
-
-        # Process Sell Countdown
-        if sell_countdown_active:
-            # Mark countdown as active in dataframe
-            df.loc[df.index[i], "sell_countdown_active"] = 1
-
-            # Check for countdown cancel condition (close below TDST)
-            if sell_tdst_level is not None and df["close"].iloc[i] < sell_tdst_level:
-                # Cancel the sell countdown
-                sell_countdown_active = False
-                sell_countdown_bars = []
-                df.loc[df.index[i], "sell_countdown"] = 0
-                continue
-
-            # Check for countdown qualifying bar: Close >= High of 2 bars earlier
-            if i >= 2 and df["close"].iloc[i] >= df["high"].iloc[i - 2]:
-                # Add this bar to qualifying bars
-                sell_countdown_bars.append(i)
-
-                # Update countdown count
-                current_count = len(sell_countdown_bars)
-                df.loc[df.index[i], "sell_countdown"] = current_count
-
-                # Check for countdown completion at 13
-                if current_count == 13:
-                    # Store information about this completion
-                    sell_completions.append({
-                        "index": i,
-                        "bars": sell_countdown_bars.copy(),
-                        "perfect": False
-                    })
-                    
-                    # Check for perfect 13
-                    if len(sell_countdown_bars) >= 8:
-                        bar_8_idx = sell_countdown_bars[7]  # 8th bar (0-indexed)
-                        # Perfect Sell 13: Close of bar 13 ≥ High of bar 8
-                        if df["close"].iloc[i] >= df["high"].iloc[bar_8_idx]:
-                            df.loc[df.index[i], "perfect_sell_13"] = 1
-                            sell_completions[-1]["perfect"] = True
-                    
-                    # Reset countdown after reaching 13
-                    sell_countdown_active = False
-            else:
-                # Bar doesn't qualify, but countdown continues
-                # Keep the previous countdown value
-                if sell_countdown_bars:
-                    df.loc[df.index[i], "sell_countdown"] = len(sell_countdown_bars)
-    
-    # Second pass - Calculate and manage stop levels for buy countdowns
-    for completion in buy_completions:
-        completion_idx = completion["index"]
-        countdown_bars_indices = completion["bars"]
-        countdown_bars = df.iloc[countdown_bars_indices]
-        
-        # Calculate buy countdown stop level
-        buy_countdown_stop = _calculate_countdown_buy_stop_level(countdown_bars)
-        
-        # Track stop level state through time
-        active = True
-        triggered = False
-        
-        # Apply from completion point forward
-        for i in range(completion_idx, len(df)):
-            # Check for stop level breach (deactivation)
-            if active and df["low"].iloc[i] <= buy_countdown_stop:
-                active = False
-                triggered = True
-                df.loc[df.index[i], "buy_countdown_stop_active"] = False
-                df.loc[df.index[i], "buy_countdown_stop_triggered"] = True
-            # Check for reactivation after being triggered
-            elif not active and triggered and df["low"].iloc[i] > buy_countdown_stop:
-                active = True
-                df.loc[df.index[i], "buy_countdown_stop_active"] = True
-                df.loc[df.index[i], "buy_countdown_stop_reactivated"] = True
-                triggered = False  # Reset trigger after reactivation
-            
-            # Set the stop level regardless of active state
-            df.loc[df.index[i], "buy_countdown_stop"] = buy_countdown_stop
-            
-            # Only set active flag if active
-            if active:
-                df.loc[df.index[i], "buy_countdown_stop_active"] = True
-            
-            # Stop when we reach another buy completion
-            next_completion = False
-            for other_completion in buy_completions:
-                if other_completion["index"] == i and i > completion_idx:
-                    next_completion = True
-                    break
-            if next_completion:
-                break
-    
-    # Third pass - Calculate and manage stop levels for sell countdowns
-    for completion in sell_completions:
-        completion_idx = completion["index"]
-        countdown_bars_indices = completion["bars"]
-        countdown_bars = df.iloc[countdown_bars_indices]
-        
-        # Calculate sell countdown stop level
-        sell_countdown_stop = _calculate_countdown_sell_stop_level(countdown_bars)
-        
-        # Track stop level state through time
-        active = True
-        triggered = False
-        
-        # Apply from completion point forward
-        for i in range(completion_idx, len(df)):
-            # Check for stop level breach (deactivation)
-            if active and df["high"].iloc[i] >= sell_countdown_stop:
-                active = False
-                triggered = True
-                df.loc[df.index[i], "sell_countdown_stop_active"] = False
-                df.loc[df.index[i], "sell_countdown_stop_triggered"] = True
-            # Check for reactivation after being triggered
-            elif not active and triggered and df["high"].iloc[i] < sell_countdown_stop:
-                active = True
-                df.loc[df.index[i], "sell_countdown_stop_active"] = True
-                df.loc[df.index[i], "sell_countdown_stop_reactivated"] = True
-                triggered = False  # Reset trigger after reactivation
-            
-            # Set the stop level regardless of active state
-            df.loc[df.index[i], "sell_countdown_stop"] = sell_countdown_stop
-            
-            # Only set active flag if active
-            if active:
-                df.loc[df.index[i], "sell_countdown_stop_active"] = True
-            
-            # Stop when we reach another sell completion
-            next_completion = False
-            for other_completion in sell_completions:
-                if other_completion["index"] == i and i > completion_idx:
-                    next_completion = True
-                    break
-            if next_completion:
-                break
-    
-    return df
+    high, low, _ = prices
+    buy_setup = td["buy_setup"]
+    sell_setup = td["sell_setup"]
 
+    perfect_buy_9 = td["perfect_buy_9"]
+    perfect_sell_9 = td["perfect_sell_9"]
 
-def _calculate_countdown_buy_stop_level(countdown_bars):
-    """
-    Calculate buy countdown stop level: lowest low of the countdown bars minus the range of the lowest bar.
-    
-    Similar to buy setup stop level, but applied to countdown qualifying bars.
-    
-    Parameters:
-    -----------
-    countdown_bars : pandas.DataFrame
-        DataFrame containing all bars that qualified for the countdown
-        
-    Returns:
-    --------
-    float
-        Buy countdown stop level value
-    """
-    # Original buy countdown stop is the lowest low of the countdown
-    buy_stop = countdown_bars["low"].min()
+    # Perfect Buy 9: Low of bar 9 < Low of bar 6
+    perfect_buy_9[3:][(buy_setup[3:] == 9) & (low[3:] < low[:-3])] = 1
 
-    # Find the bar with the lowest low in the countdown
-    min_low_bar = countdown_bars[countdown_bars["low"] == buy_stop].iloc[0]
-    
-    # Calculate the range (high - low) of that bar
-    bar_range = min_low_bar["high"] - min_low_bar["low"]
-    
-    # Subtract this range from the original stop level
-    return buy_stop - bar_range
+    # Perfect Sell 9: High of bar 9 > High of bar 6
+    perfect_sell_9[3:][(sell_setup[3:] == 9) & (high[3:] > high[:-3])] = 1
 
 
-def _calculate_countdown_sell_stop_level(countdown_bars):
+def _calculate_countdown_phases(prices, td):
     """
-    Calculate sell countdown stop level: highest high of the countdown bars plus the range of the highest bar.
-    
-    Similar to sell setup stop level, but applied to countdown qualifying bars.
-    
+    Calculate TD Sequential countdown phases for both buy and sell.
+    Handles countdown progression, completion, and stop level management.
+
     Parameters:
     -----------
-    countdown_bars : pandas.DataFrame
-        DataFrame containing all bars that qualified for the countdown
-        
-    Returns:
-    --------
-    float
-        Sell countdown stop level value
-    """
-    # Original sell countdown stop is the highest high of the countdown
-    sell_stop = countdown_bars["high"].max()
-
-    # Find the bar with the highest high in the countdown
-    max_high_bar = countdown_bars[countdown_bars["high"] == sell_stop].iloc[0]
-    
-    # Calculate the range (high - low) of that bar
-    bar_range = max_high_bar["high"] - max_high_bar["low"]
-    
-    # Add this range to the original stop level
-    return sell_stop + bar_range
-
-
+    prices : tuple of numpy.ndarray
+        High, low and close prices from _price_arrays()
+    td : dict
+        Result arrays from _td_buffers(), filled in place with the countdown
+        indicators and stop levels
+    """
+    high, low, close = prices
+    n = len(close)
+
+    # Position of countdown bar 8 at each completion bar, -1 elsewhere
+    buy_bar_8_idx = np.full(n, -1, dtype=np.int64)
+    sell_bar_8_idx = np.full(n, -1, dtype=np.int64)
+
+    # Countdown stop level at each completion bar, NaN elsewhere
+    buy_completion_stop = np.full(n, np.nan)
+    sell_completion_stop = np.full(n, np.nan)
+
+    # Countdown qualifying bars, compared for all bars at once on slices.
+    # Buy: Close <= Low of 2 bars earlier, Sell: Close >= High of 2 bars earlier
+    buy_qualifier = np.zeros(n, dtype=bool)
+    sell_qualifier = np.zeros(n, dtype=bool)
+    buy_qualifier[2:] = close[2:] <= low[:-2]
+    sell_qualifier[2:] = close[2:] >= high[:-2]
+
+    # TDST levels of the setups that start the countdowns
+    buy_setup = td["buy_setup"]
+    sell_setup = td["sell_setup"]
+    new_buy_tdst, new_sell_tdst, _, _ = _setup_levels(
+        high, low, buy_setup, sell_setup
+    )
 
-def _handle_buy_setup_completion(
-    df, i, buy_countdown_active, buy_countdown_bars, buy_tdst_level, 
-    sell_countdown_active, sell_countdown_bars, current_buy_setup_idx, 
-    current_sell_setup_idx, sell_tdst_level
-):
-    """
-    Handle the completion of a buy setup (9 consecutive bars).
-    """
-    # If sell countdown is active, reset it and start buy countdown
-    if sell_countdown_active:
-        sell_countdown_active = False
-        sell_countdown_bars = []
-        current_sell_setup_idx = None
-        sell_tdst_level = None
-        df.loc[df.index[i], "sell_countdown_active"] = 0
-        df.loc[df.index[i], "sell_countdown"] = 0
-
-    # Start a new buy countdown
-    buy_countdown_active = True
-    buy_countdown_bars = []
-    current_buy_setup_idx = i
-    df.loc[df.index[i], "buy_countdown_active"] = 1
-
-    # Set TDST level for buy countdown (highest high of the buy setup)
-    buy_tdst_level = df["high"].iloc[i - 8 : i + 1].max()
-    
-    return (
-        df, buy_countdown_active, buy_countdown_bars, buy_tdst_level, 
-        sell_countdown_active, sell_countdown_bars, current_buy_setup_idx, 
-        current_sell_setup_idx, sell_tdst_level
+    # First pass - Run the countdown state machine in the compiled kernel
+    td_countdown_kernel(
+        high,
+        low,
+        close,
+        buy_setup,
+        sell_setup,
+        new_buy_tdst,
+        new_sell_tdst,
+        buy_qualifier,
+        sell_qualifier,
+        td["buy_countdown"],
+        td["sell_countdown"],
+        td["buy_countdown_active"],
+        td["sell_countdown_active"],
+        buy_bar_8_idx,
+        sell_bar_8_idx,
+        buy_completion_stop,
+        sell_completion_stop,
     )
 
+    # Perfect 13s, checked for all completions at once by gathering bar 8
+    # Perfect Buy 13: Close of bar 13 ≤ Low of bar 8
+    buy_bar_8_low = np.where(
+        buy_bar_8_idx >= 0, low[buy_bar_8_idx], -np.inf
+    )
+    td["perfect_buy_13"][:] = close <= buy_bar_8_low
+    # Perfect Sell 13: Close of bar 13 ≥ High of bar 8
+    sell_bar_8_high = np.where(
+        sell_bar_8_idx >= 0, high[sell_bar_8_idx], np.inf
+    )
+    td["perfect_sell_13"][:] = close >= sell_bar_8_high
+
+    # Stop level columns in kernel argument order
+    outputs = _kernel_buffers(
+        td,
+        (
+            "buy_countdown_stop",
+            "sell_countdown_stop",
+            "buy_countdown_stop_active",
+            "sell_countdown_stop_active",
+            "buy_countdown_stop_triggered",
+            "sell_countdown_stop_triggered",
+            "buy_countdown_stop_reactivated",
+            "sell_countdown_stop_reactivated",
+        ),
+    )
 
-def _handle_sell_setup_completion(
-    df, i, buy_countdown_active, buy_countdown_bars, buy_tdst_level, 
-    sell_countdown_active, sell_countdown_bars, current_buy_setup_idx, 
-    current_sell_setup_idx, sell_tdst_level
-):
-    """
-    Handle the completion of a sell setup (9 consecutive bars).
-    """
-    # If buy countdown is active, reset it and start sell countdown
-    if buy_countdown_active:
-        buy_countdown_active = False
-        buy_countdown_bars = []
-        current_buy_setup_idx = None
-        buy_tdst_level = None
-        df.loc[df.index[i], "buy_countdown_active"] = 0
-        df.loc[df.index[i], "buy_countdown"] = 0
-
-    # Start a new sell countdown
-    sell_countdown_active = True
-    sell_countdown_bars = []
-    current_sell_setup_idx = i
-    df.loc[df.index[i], "sell_countdown_active"] = 1
-
-    # Set TDST level for sell countdown (lowest low of the sell setup)
-    sell_tdst_level = df["low"].iloc[i - 8 : i + 1].min()
-    
-    return (
-        df, buy_countdown_active, buy_countdown_bars, buy_tdst_level, 
-        sell_countdown_active, sell_countdown_bars, current_buy_setup_idx, 
-        current_sell_setup_idx, sell_tdst_level
+    # Second pass - Apply the countdown stop levels from each completion
+    countdown_stop_kernel(
+        high, low, buy_completion_stop, sell_completion_stop, *outputs
     )
 
 
-def _process_buy_countdown(df, i, buy_countdown_active, buy_countdown_bars, buy_tdst_level):
+def _identify_stop_events(td):
     """
-    Process buy countdown at the current bar.
+    Identify where stop loss levels were triggered and reactivated.
     """
-    # Mark countdown as active in dataframe
-    df.loc[df.index[i], "buy_countdown_active"] = 1
-
-    # Check for countdown cancel condition (close above TDST)
-    if buy_tdst_level is not None and df["close"].iloc[i] > buy_tdst_level:
-        # Cancel the buy countdown
-        buy_countdown_active = False
-        buy_countdown_bars = []
-        df.loc[df.index[i], "buy_countdown"] = 0  # Reset buy_countdown
-        return df, buy_countdown_active, buy_countdown_bars
-
-    # Check for countdown qualifying bar: Close <= Low of 2 bars earlier
-    if i >= 2 and df["close"].iloc[i] <= df["low"].iloc[i - 2]:
-        # Add this bar to qualifying bars
-        buy_countdown_bars.append(i)
-
-        # Update countdown count
-        current_count = len(buy_countdown_bars)
-        df.loc[df.index[i], "buy_countdown"] = current_count
-
-        # Check for perfect 13 when we reach the 13th bar
-        if current_count == 13:
-            # Get bar 8 of the countdown
-            if len(buy_countdown_bars) >= 8:
-                bar_8_idx = buy_countdown_bars[7]  # 8th bar (0-indexed)
-
-                # Perfect Buy 13: Close of bar 13 ≤ Low of bar 8
-                if df["close"].iloc[i] <= df["low"].iloc[bar_8_idx]:
-                    df.loc[df.index[i], "perfect_buy_13"] = 1
-                    
-            # Calculate buy countdown stop level when countdown completes
-            countdown_bars = df.iloc[buy_countdown_bars]
-            buy_countdown_stop = _calculate_countdown_buy_stop_level(countdown_bars)
-            df.loc[df.index[i], "buy_countdown_stop"] = buy_countdown_stop
-            df.loc[df.index[i], "buy_countdown_stop_active"] = True
-
-            # Reset countdown after reaching 13
-            buy_countdown_active = False
-    else:
-        # Bar doesn't qualify, but countdown continues
-        # Keep the previous countdown value
-        if buy_countdown_bars:
-            df.loc[df.index[i], "buy_countdown"] = len(buy_countdown_bars)
+    # Each event compares a bar with the previous one, so the conditions are
+    # evaluated for all bars at once on the shifted arrays
+    for side in ("buy", "sell"):
+        setup_stop = td[f"{side}_setup_stop"]
+        setup_active = td[f"{side}_setup_stop_active"]
+        was_active, is_active = setup_active[:-1], setup_active[1:]
 
-    return df, buy_countdown_active, buy_countdown_bars
+        # Detect setup stop triggering
+        td[f"{side}_stop_triggered"][1:] |= (
+            was_active & ~is_active & ~np.isnan(setup_stop[:-1])
+        )
 
+        # Detect setup stop reactivation, unless a new setup completes
+        td[f"{side}_stop_reactivated"][1:] |= (
+            ~was_active & is_active & (td[f"{side}_setup"][1:] != 9)
+        )
 
-def _process_sell_countdown(df, i, sell_countdown_active, sell_countdown_bars, sell_tdst_level):
-    """
-    Process sell countdown at the current bar.
-    """
-    # Mark countdown as active in dataframe
-    df.loc[df.index[i], "sell_countdown_active"] = 1
-
-    # Check for countdown cancel condition (close below TDST)
-    if sell_tdst_level is not None and df["close"].iloc[i] < sell_tdst_level:
-        # Cancel the sell countdown
-        sell_countdown_active = False
-        sell_countdown_bars = []
-        df.loc[df.index[i], "sell_countdown"] = 0  # Reset sell_countdown
-        return df, sell_countdown_active, sell_countdown_bars
-
-    # Check for countdown qualifying bar: Close >= High of 2 bars earlier
-    if i >= 2 and df["close"].iloc[i] >= df["high"].iloc[i - 2]:
-        # Add this bar to qualifying bars
-        sell_countdown_bars.append(i)
-
-        # Update countdown count
-        current_count = len(sell_countdown_bars)
-        df.loc[df.index[i], "sell_countdown"] = current_count
-
-        # Check for perfect 13 when we reach the 13th bar
-        if current_count == 13:
-            # Get bar 8 of the countdown
-            if len(sell_countdown_bars) >= 8:
-                bar_8_idx = sell_countdown_bars[7]  # 8th bar (0-indexed)
-
-                # Perfect Sell 13: Close of bar 13 ≥ High of bar 8
-                if df["close"].iloc[i] >= df["high"].iloc[bar_8_idx]:
-                    df.loc[df.index[i], "perfect_sell_13"] = 1
-                    
-            # Calculate sell countdown stop level when countdown completes
-            countdown_bars = df.iloc[sell_countdown_bars]
-            sell_countdown_stop = _calculate_countdown_sell_stop_level(countdown_bars)
-            df.loc[df.index[i], "sell_countdown_stop"] = sell_countdown_stop
-            df.loc[df.index[i], "sell_countdown_stop_active"] = True
-
-            # Reset countdown after reaching 13
-            sell_countdown_active = False
-    else:
-        # Bar doesn't qualify, but countdown continues
-        # Keep the previous countdown value
-        if sell_countdown_bars:
-            df.loc[df.index[i], "sell_countdown"] = len(sell_countdown_bars)
+        countdown_stop = td[f"{side}_countdown_stop"]
+        countdown_active = td[f"{side}_countdown_stop_active"]
+        was_active, is_active = countdown_active[:-1], countdown_active[1:]
 
-    return df, sell_countdown_active, sell_countdown_bars
+        # Detect countdown stop triggering
+        td[f"{side}_countdown_stop_triggered"][1:] |= (
+            was_active & ~is_active & ~np.isnan(countdown_stop[:-1])
+        )
 
+        # Detect countdown stop reactivation, unless a new countdown completes.
+        # Bars already marked in the calculation phase stay marked
+        td[f"{side}_countdown_stop_reactivated"][1:] |= (
+            ~was_active & is_active & (td[f"{side}_countdown"][1:] != 13)
+        )
 
-def _identify_stop_events(df):
-    """
-    Identify where stop loss levels were triggered and reactivated.
-    """
-    for i in range(1, len(df)):
-        # Detect setup stop triggering
-        if (
-            df["buy_setup_stop_active"].iloc[i - 1] == True
-            and df["buy_setup_stop_active"].iloc[i] == False
-            and not pd.isna(df["buy_setup_stop"].iloc[i - 1])
-        ):
-            df.loc[df.index[i], "buy_stop_triggered"] = True
-
-        if (
-            df["sell_setup_stop_active"].iloc[i - 1] == True
-            and df["sell_setup_stop_active"].iloc[i] == False
-            and not pd.isna(df["sell_setup_stop"].iloc[i - 1])
-        ):
-            df.loc[df.index[i], "sell_stop_triggered"] = True
-
-        # Detect setup stop reactivation
-        if (
-            df["buy_setup_stop_active"].iloc[i - 1] == False
-            and df["buy_setup_stop_active"].iloc[i] == True
-            and df["buy_setup"].iloc[i] != 9
-        ):  # Not a new setup
-            df.loc[df.index[i], "buy_stop_reactivated"] = True
-
-        if (
-            df["sell_setup_stop_active"].iloc[i - 1] == False
-            and df["sell_setup_stop_active"].iloc[i] == True
-            and df["sell_setup"].iloc[i] != 9
-        ):  # Not a new setup
-            df.loc[df.index[i], "sell_stop_reactivated"] = True
-            
-        # Detect countdown stop triggering
-        if (
-            df["buy_countdown_stop_active"].iloc[i - 1] == True
-            and df["buy_countdown_stop_active"].iloc[i] == False
-            and not pd.isna(df["buy_countdown_stop"].iloc[i - 1])
-        ):
-            df.loc[df.index[i], "buy_countdown_stop_triggered"] = True
-
-        if (
-            df["sell_countdown_stop_active"].iloc[i - 1] == True
-            and df["sell_countdown_stop_active"].iloc[i] == False
-            and not pd.isna(df["sell_countdown_stop"].iloc[i - 1])
-        ):
-            df.loc[df.index[i], "sell_countdown_stop_triggered"] = True
-
-        # Detect countdown stop reactivation (if not already marked in calculation phase)
-        if (
-            df["buy_countdown_stop_active"].iloc[i - 1] == False
-            and df["buy_countdown_stop_active"].iloc[i] == True
-            and df["buy_countdown"].iloc[i] != 13
-            and not df["buy_countdown_stop_reactivated"].iloc[i]
-        ):  # Not a new countdown completion and not already marked
-            df.loc[df.index[i], "buy_countdown_stop_reactivated"] = True
-
-        if (
-            df["sell_countdown_stop_active"].iloc[i - 1] == False
-            and df["sell_countdown_stop_active"].iloc[i] == True
-            and df["sell_countdown"].iloc[i] != 13
-            and not df["sell_countdown_stop_reactivated"].iloc[i]
-        ):  # Not a new countdown completion and not already marked
-            df.loc[df.index[i], "sell_countdown_stop_reactivated"] = True
-
-    return df
\ No newline at end of file
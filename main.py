@@ -1,60 +1,439 @@
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 import streamlit as st
-import yfinance as yf
 import json
 import os
+from types import MappingProxyType
 
-from calculate_tds import calculate_tdsequential
-from plot_tds import plot_tdsequential
-from calculate_eqcrv import (
-    calculate_performance_metrics,
-    apply_simple_strategy,
-    create_performance_plots,
-)
 from models import create_tables
-from portfolio_management import display_portfolio_management
+
+# The page modules, yfinance and Plotly are imported in the branch of the
+# selected page below, so each page only loads what it uses
+
+# Languages as (code, display name) pairs and the position of each code
+LANGS = (("en", "English"), ("tr", "Türkçe"))
+LANG_KEYS = tuple(code for code, _ in LANGS)
+LANG_NAMES = MappingProxyType(dict(LANGS))
+LANG_INDEX = MappingProxyType({code: i for i, code in enumerate(LANG_KEYS)})
+
+PAGE_OPTIONS = ("TD Sequential Indicator", "Portfolio Management")
+STOCK_OPTIONS = ("AAPL", "GOLD", "BITCOIN", "Other")
+
+# Time period options, "3 months" is the default selection
+PERIOD_OPTIONS = (
+    "3 months",
+    "1 day",
+    "1 week",
+    "1 month",
+    "6 months",
+    "1 year",
+    "Other",
+)
+PERIOD_DAYS = MappingProxyType(
+    {
+        "1 day": 1,
+        "1 week": 7,
+        "1 month": 30,
+        "3 months": 90,
+        "6 months": 180,
+        "1 year": 365,
+    }
+)
+
+# Columns and number of most recent rows shown in the data table, the
+# full results are available through the CSV download
+DISPLAY_COLS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "buy_setup",
+    "sell_setup",
+    "buy_countdown",
+    "sell_countdown",
+    "buy_tdst_level",
+    "sell_tdst_level",
+    "buy_setup_stop",
+    "sell_setup_stop",
+    "buy_countdown_stop",
+    "sell_countdown_stop",
+    "Signal",
+    "Position",
+    "Equity",
+    "Daily_Return",
+    "Cumulative_Return",
+    "Drawdown",
+)
+
+# Number formats of the data table, applied by the browser when rendering
+# instead of formatting every cell into a string in Python
+PRICE_FORMAT_COLS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "buy_tdst_level",
+    "sell_tdst_level",
+    "buy_setup_stop",
+    "sell_setup_stop",
+    "buy_countdown_stop",
+    "sell_countdown_stop",
+    "Equity",
+)
+PERCENT_FORMAT_COLS = ("Daily_Return", "Cumulative_Return", "Drawdown")
+DISPLAY_COLUMN_CONFIG = {
+    **{col: st.column_config.NumberColumn(format="%.2f") for col in PRICE_FORMAT_COLS},
+    **{
+        col: st.column_config.NumberColumn(format="%.2f%%")
+        for col in PERCENT_FORMAT_COLS
+    },
+    **{
+        col: st.column_config.NumberColumn(format="%d")
+        for col in ("buy_setup", "sell_setup", "buy_countdown", "sell_countdown")
+    },
+}
+DISPLAY_ROWS = 500
+
+# Latest TD Sequential values shown for each symbol of a comparison
+COMPARISON_COLS = (
+    "close",
+    "buy_setup",
+    "sell_setup",
+    "buy_countdown",
+    "sell_countdown",
+    "buy_tdst_level",
+    "sell_tdst_level",
+)
+
+# yfinance price columns, downcast to float32 after each download
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+
+# yfinance interval codes and their display names
+INTERVAL_OPTIONS = ("1d", "5m", "15m", "1h", "4h", "1wk", "1mo")
+INTRADAY_INTERVALS = frozenset(("5m", "15m", "1h", "4h"))
+INTERVAL_NAMES = MappingProxyType(
+    {
+        "1d": "1 Day",
+        "5m": "5 Minutes",
+        "15m": "15 Minutes",
+        "1h": "1 Hour",
+        "4h": "4 Hours",
+        "1wk": "1 Week",
+        "1mo": "1 Month",
+    }
+)
+
+
+def hash_frame(df):
+    """Cache key of a DataFrame: its column names and the hash of each row
+
+    Used in place of Streamlit's generic DataFrame hashing, which is several
+    times slower and runs on every cached call.
+    """
+    return tuple(df.columns), pd.util.hash_pandas_object(df).to_numpy().tobytes()
+
+
+FRAME_HASH_FUNCS = {pd.DataFrame: hash_frame}
+
+
+@lru_cache(maxsize=8)
+def _read_translations(lang):
+    """Read the translations JSON file of a language
+
+    The parsed file is kept for the life of the process and returned as a
+    read-only mapping, so reruns share it without copying. Errors are raised
+    and not cached, so a failed read is retried on the next rerun.
+    """
+    file_path = os.path.join("translations", f"{lang}.json")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return MappingProxyType(json.load(f))
 
 
 def load_translations(lang):
     """Load translations from JSON file based on selected language"""
     try:
-        file_path = os.path.join("translations", f"{lang}.json")
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _read_translations(lang)
     except Exception as e:
         st.error(f"Error loading translations: {e}")
-        # Return empty dict as fallback
-        return {}
+        # Return empty mapping as fallback
+        return MappingProxyType({})
 
 
-def get_stock_data(ticker, start_date, end_date, interval):
-    """Download stock data using yfinance and fix column names"""
+@st.cache_data(ttl=300, show_spinner=False)
+def get_multiple_stock_data(tickers, start_date, end_date, interval):
+    """Download data of several stocks in a single yfinance request
+
+    Results are cached for 5 minutes. Pass dates rather than datetimes so
+    that reruns within the same day hit the cache.
+
+    Returns a dict of ticker to DataFrame, or None if the download failed.
+    """
     try:
-        data = yf.download(ticker, start=start_date, end=end_date, interval=interval)
-        # Fix column names
-        data.columns = [col[0] for col in data.columns]
-        return data
+        # yfinance treats the end date as exclusive, include end_date itself
+        data = yf.download(
+            " ".join(tickers),
+            start=start_date,
+            end=end_date + timedelta(days=1),
+            interval=interval,
+            group_by="ticker",
+            threads=True,
+            progress=False,
+            # Split/dividend adjusted prices, as with the implicit default, so
+            # TD comparisons and strategy returns don't jump at splits
+            auto_adjust=True,
+        )
+        # Store prices as float32, halving the memory of the cached data and
+        # of the arrays passed to the TD Sequential kernels. Volume keeps its
+        # 64-bit type since crypto volumes overflow int32
+        is_price = data.columns.get_level_values(-1).isin(PRICE_COLUMNS)
+        data = data.astype(dict.fromkeys(data.columns[is_price], np.float32))
+
+        # Older yfinance versions return flat price columns for one ticker
+        if not isinstance(data.columns, pd.MultiIndex):
+            if len(tickers) == 1 and not data.empty:
+                return {tickers[0]: data}
+            return {}
+
+        # Split the (ticker, price) columns into one DataFrame per ticker and
+        # drop the rows that only exist for the other tickers
+        tickers_found = data.columns.unique(level=0)
+        return {
+            ticker: data.xs(ticker, axis=1, level=0).dropna(how="all")
+            for ticker in tickers
+            if ticker in tickers_found
+        }
     except Exception as e:
         st.error(f"Error downloading data: {e}")
         return None
 
 
+def get_stock_data(ticker, start_date, end_date, interval):
+    """Download stock data of a single ticker using yfinance"""
+    data = get_multiple_stock_data((ticker,), start_date, end_date, interval)
+    if data is None:
+        return None
+    return data.get(ticker)
+
+
+def period_bars(data, period_days, interval):
+    """Bars of the selected period up to now
+
+    Prices are downloaded by whole dates so that the cache key stays the same
+    within a day. For intraday intervals that covers up to a day more than
+    the period, so only the bars of the last period_days days are kept.
+    """
+    if data is None or interval not in INTRADAY_INTERVALS:
+        return data
+    cutoff = pd.Timestamp.now(tz=data.index.tz) - timedelta(days=period_days)
+    return data[data.index >= cutoff]
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_ticker_info(ticker):
+    """Fetch the quote information of a stock using yfinance
+
+    Results are cached as long as the downloaded prices, so the current
+    price shown is never older than the price data next to it.
+    """
+    return yf.Ticker(ticker).info
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_tdsequential(data, ticker):
+    """Calculate TD Sequential indicators, cached on the downloaded data"""
+    return calculate_tdsequential(data, stock_name=ticker)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_tdsequential_batch(stock_data):
+    """Calculate TD Sequential indicators of several stocks, cached on the
+    downloaded data
+
+    The setup phases are counted with the serial kernel, one stock after the
+    other: the parallel kernel's threading layer keeps the process from
+    exiting once it is started from Streamlit's script thread.
+    """
+    return calculate_tdsequential_batch(stock_data)
+
+
+def comparison_table(td_frames):
+    """Latest TD Sequential values of each symbol, one row per symbol"""
+    table = pd.concat(
+        {symbol: df[list(COMPARISON_COLS)].tail(1) for symbol, df in td_frames.items()}
+    )
+    return table.droplevel(1)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_strategy(td_data, initial_capital, strategy_type, fast_period, slow_period):
+    """Apply the trading strategy, cached on the TD Sequential data"""
+    return apply_simple_strategy(
+        td_data,
+        initial_capital=initial_capital,
+        strategy_type=strategy_type,
+        fast_period=fast_period,
+        slow_period=slow_period,
+    )
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_performance_metrics(df_strategy, initial_capital):
+    """Calculate performance metrics, cached on the strategy results"""
+    return calculate_performance_metrics(df_strategy, initial_capital=initial_capital)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_td_figure(
+    td_data,
+    ticker,
+    window,
+    show_support_resistance,
+    show_setup_stop_loss,
+    show_countdown_stop_loss,
+):
+    """Build the TD Sequential chart, cached per data and display options"""
+    return plot_tdsequential(
+        td_data,
+        stock_name=ticker,
+        window=window,
+        show_support_resistance=show_support_resistance,
+        show_setup_stop_loss=show_setup_stop_loss,
+        show_countdown_stop_loss=show_countdown_stop_loss,
+    )
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_performance_plots(df_strategy, metrics_items, title):
+    """Build the performance figures, cached per results and metrics
+
+    metrics_items is the metrics dict as a tuple of (name, value) pairs,
+    keeping the display order of the metrics table.
+    """
+    return create_performance_plots(df_strategy, dict(metrics_items), title)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_csv(df):
+    """Encode a DataFrame as CSV for download, cached on the data"""
+    return df.to_csv().encode("utf-8")
+
+
+@st.fragment
+def render_analysis_tabs(t, ticker, td_data, df_strategy, metrics, info):
+    """Display the analysis results in tabs
+
+    Runs as a fragment, so toggling a display option only reruns the tabs
+    instead of the whole script.
+    """
+    # Create visualizations
+    title = f"{ticker} Trading Performance:"
+    equity_fig, metrics_fig = cached_performance_plots(
+        df_strategy, tuple(metrics.items()), title
+    )
+
+    # Create tabs for different views
+    tab1, tab2, tab3, tab4 = st.tabs(
+        [
+            t.get("tab_chart", "TD Sequential Chart"),
+            t.get("tab_data", "Data Table"),
+            t.get("tab_equity", "Equity Curve"),
+            t.get("tab_metrics", "Performance Metrics"),
+        ]
+    )
+
+    with tab1:
+        # Add checkboxes for display options
+        with st.expander(t.get("display_options", "Display Options"), expanded=False):
+            show_support_resistance = st.checkbox(
+                t.get("show_support_resistance", "Display Support/Resistance"),
+                value=True,
+                help=t.get(
+                    "show_support_resistance_help",
+                    "Show support and resistance levels on the chart",
+                ),
+            )
+            show_setup_stop_loss = st.checkbox(
+                t.get("show_setup_stop_loss", "Display Setup Stop Loss"),
+                value=True,
+                help=t.get(
+                    "show_setup_stop_loss_help",
+                    "Show stop loss levels for TD Sequential setups",
+                ),
+            )
+            show_countdown_stop_loss = st.checkbox(
+                t.get("show_countdown_stop_loss", "Display Countdown Stop Loss"),
+                value=True,
+                help=t.get(
+                    "show_countdown_stop_loss_help",
+                    "Show stop loss levels for TD Sequential countdowns",
+                ),
+            )
+
+        # Plot candlestick chart with TD Sequential indicators
+        td_fig = cached_td_figure(
+            td_data,
+            ticker,
+            window=1000,
+            show_support_resistance=show_support_resistance,
+            show_setup_stop_loss=show_setup_stop_loss,
+            show_countdown_stop_loss=show_countdown_stop_loss,
+        )
+        st.plotly_chart(td_fig, use_container_width=True)
+
+    with tab2:
+        st.write("Current Price:", info.get("currentPrice", "N/A"))
+        # Only send the main columns of the latest rows to the browser
+        display_cols = df_strategy.columns.intersection(DISPLAY_COLS, sort=False)
+        st.dataframe(
+            df_strategy[display_cols].tail(DISPLAY_ROWS),
+            use_container_width=True,
+            column_config=DISPLAY_COLUMN_CONFIG,
+        )
+        if len(df_strategy) > DISPLAY_ROWS:
+            st.caption(
+                t.get(
+                    "data_table_tail",
+                    "Showing the last {rows} of {total} rows. Download the CSV for all data.",
+                ).format(rows=DISPLAY_ROWS, total=len(df_strategy))
+            )
+        st.download_button(
+            t.get("download_csv", "Download CSV"),
+            data=cached_csv(df_strategy),
+            file_name=f"{ticker}_td_sequential.csv",
+            mime="text/csv",
+        )
+
+    with tab3:
+        st.plotly_chart(equity_fig, use_container_width=True)
+
+    with tab4:
+        st.plotly_chart(metrics_fig, use_container_width=True)
+
+
+@st.cache_resource
+def init_database():
+    """Create the database tables once per server process"""
+    create_tables()
+    return True
+
+
 # Ensure database tables are created
-create_tables()
+init_database()
 
 # Initialize session state for language if it doesn't exist
 if "language" not in st.session_state:
     st.session_state.language = "en"  # default language is English
 
-# Create language selector in the sidebar (before any other UI elements)
-langs = {"en": "English", "tr": "Türkçe"}
-
-# Add language selection to the very top of the sidebar
+# Add language selection to the very top of the sidebar (before any other UI elements)
 selected_lang = st.sidebar.selectbox(
     "Language / Dil",
-    options=list(langs.keys()),
-    format_func=lambda x: langs[x],
-    index=list(langs.keys()).index(st.session_state.language),
+    options=LANG_KEYS,
+    format_func=LANG_NAMES.get,
+    index=LANG_INDEX[st.session_state.language],
 )
 
 # Update session state if language changed
@@ -66,88 +445,91 @@ if selected_lang != st.session_state.language:
 t = load_translations(st.session_state.language)
 
 # Create navigation
-page_options = ["TD Sequential Indicator", "Portfolio Management"]
 selected_page = st.sidebar.radio(
     t.get("navigation", "Navigation"),
-    options=page_options,
+    options=PAGE_OPTIONS,
     format_func=lambda x: t.get(x.lower().replace(" ", "_"), x),
 )
 
 if selected_page == "Portfolio Management":
+    from portfolio_management import display_portfolio_management
+
     display_portfolio_management(t)
 else:
+    import yfinance as yf
+    from calculate_tds import calculate_tdsequential, calculate_tdsequential_batch
+    from plot_tds import plot_tdsequential
+    from calculate_eqcrv import (
+        calculate_performance_metrics,
+        apply_simple_strategy,
+        create_performance_plots,
+    )
+
     # Set the page title
     st.title(t.get("app_title", "TD Sequential Indicator"))
 
     # Sidebar for stock selection
     st.sidebar.header(t.get("settings", "Settings"))
-    stock_options = ["AAPL", "GOLD", "BITCOIN", "Other"]
     selected_stock_option = st.sidebar.selectbox(
-        t.get("select_stock", "Select Stock/Asset"), stock_options
+        t.get("select_stock", "Select Stock/Asset"), STOCK_OPTIONS
     )
 
-    # If "Other" is selected, let the user input a custom stock symbol
+    # If "Other" is selected, let the user input a custom stock symbol,
+    # uppercased to match the columns yfinance returns
     if selected_stock_option == "BITCOIN":
         ticker = "BTC-USD"
     elif selected_stock_option == "Other":
-        ticker = st.sidebar.text_input(
-            t.get("enter_stock", "Enter Stock Symbol"), "MSFT"
+        ticker = (
+            st.sidebar.text_input(t.get("enter_stock", "Enter Stock Symbol"), "MSFT")
+            .strip()
+            .upper()
         )
     else:
         ticker = selected_stock_option
 
+    # Other symbols to compare, without duplicates and the selected symbol
+    compare_input = st.sidebar.text_input(
+        t.get("compare_symbols", "Compare Symbols (comma separated)"),
+        "",
+        help=t.get(
+            "compare_symbols_help",
+            "Other symbols to calculate TD Sequential for along with the selected one",
+        ),
+    )
+    compare_tickers = tuple(
+        dict.fromkeys(
+            symbol
+            for symbol in (part.strip().upper() for part in compare_input.split(","))
+            if symbol and symbol != ticker
+        )
+    )
+
     # Time period selection
-    period_options = [
-        "3 months",
-        "1 day",
-        "1 week",
-        "1 month",
-        "6 months",
-        "1 year",
-        "Other",
-    ]
     selected_period = st.sidebar.selectbox(
-        t.get("select_period", "Select Time Period"), period_options
+        t.get("select_period", "Select Time Period"), PERIOD_OPTIONS
     )
 
-    # If "Other" is selected, let the user input a custom period
-    if selected_period == "Other":
-        custom_period_days = st.sidebar.number_input(
+    # Midnight today, so every rerun within a day requests the same dates.
+    # Intraday bars are cut back to the period up to now after the download
+    end_date = pd.Timestamp.today().normalize().to_pydatetime()
+
+    # "Other" has no fixed length, let the user input a custom period
+    period_days = PERIOD_DAYS.get(selected_period)
+    if period_days is None:
+        period_days = st.sidebar.number_input(
             t.get("enter_days", "Enter Number of Days"), min_value=1, value=30
         )
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=custom_period_days)
-    else:
-        end_date = datetime.now()
-        period_days = {
-            "1 day": 1,
-            "1 week": 7,
-            "1 month": 30,
-            "3 months": 90,
-            "6 months": 180,
-            "1 year": 365,
-        }
-        start_date = end_date - timedelta(days=period_days.get(selected_period, 90))
+    start_date = end_date - timedelta(days=period_days)
 
     # Interval selection
-    interval_options = ["1d", "5m", "15m", "1h", "4h", "1wk", "1mo"]
-    interval_names = {
-        "1d": "1 Day",
-        "5m": "5 Minutes",
-        "15m": "15 Minutes",
-        "1h": "1 Hour",
-        "4h": "4 Hours",
-        "1wk": "1 Week",
-        "1mo": "1 Month",
-    }
     selected_interval = st.sidebar.selectbox(
         t.get("select_interval", "Select Interval"),
-        interval_options,
-        format_func=lambda x: interval_names[x],
+        INTERVAL_OPTIONS,
+        format_func=lambda x: INTERVAL_NAMES[x],
     )
 
     # Add note about intraday data limitations
-    if selected_interval in ["5m", "15m", "1h", "4h"]:
+    if selected_interval in INTRADAY_INTERVALS:
         st.sidebar.info(
             t.get(
                 "intraday_note",
@@ -155,35 +537,6 @@ else:
             )
         )
 
-    # Add checkboxes for display options
-    display_options = st.sidebar.expander(
-        t.get("display_options", "Display Options"), expanded=False
-    )
-    show_support_resistance = display_options.checkbox(
-        t.get("show_support_resistance", "Display Support/Resistance"),
-        value=True,
-        help=t.get(
-            "show_support_resistance_help",
-            "Show support and resistance levels on the chart",
-        ),
-    )
-    show_setup_stop_loss = display_options.checkbox(
-        t.get("show_setup_stop_loss", "Display Setup Stop Loss"),
-        value=True,
-        help=t.get(
-            "show_setup_stop_loss_help",
-            "Show stop loss levels for TD Sequential setups",
-        ),
-    )
-    show_countdown_stop_loss = display_options.checkbox(
-        t.get("show_countdown_stop_loss", "Display Countdown Stop Loss"),
-        value=True,
-        help=t.get(
-            "show_countdown_stop_loss_help",
-            "Show stop loss levels for TD Sequential countdowns",
-        ),
-    )
-
     # Strategy settings
     strategy_options = st.sidebar.expander(
         t.get("strategy_options", "Strategy Options"), expanded=False
@@ -192,77 +545,115 @@ else:
         t.get("initial_capital", "Initial Capital"), value=100000, step=10000
     )
     
+    # Analysis results are kept in the session state for these settings, so
+    # reruns that don't change them (e.g. switching the language) redisplay
+    # the results without running the analysis again
+    strategy_type = "dabak"  # Could make configurable
+    analysis_key = (
+        ticker,
+        start_date.date(),
+        end_date.date(),
+        selected_interval,
+        initial_capital,
+        strategy_type,
+        compare_tickers,
+    )
+
     # Display Analysis button (renamed from Download Data)
     if st.sidebar.button(t.get("display_analysis", "Display Analysis")):
-        # Load data
-        data = get_stock_data(ticker, start_date, end_date, selected_interval)
+        # Fetch the quote information in a background thread, the request
+        # overlaps with the price download and the calculations below
+        executor = ThreadPoolExecutor(max_workers=1)
+        info_future = executor.submit(get_ticker_info, ticker)
+        executor.shutdown(wait=False)
 
-        instant_info = yf.Ticker(ticker)
-        info = instant_info.info 
-
-        # Display data information
-        if data is not None and not data.empty:
-            st.header(f"{ticker} {t.get('analysis', 'Analysis')}")
-            st.write(
-                f"{t.get('period', 'Period')}: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+        # Load data
+        td_frames = {}
+        if compare_tickers:
+            # Download every symbol in one request and calculate them in one
+            # batch
+            stock_data = get_multiple_stock_data(
+                (ticker, *compare_tickers),
+                start_date.date(),
+                end_date.date(),
+                selected_interval,
             )
-            st.write(
-                f"{t.get('interval', 'Interval')}: {interval_names[selected_interval]}"
+            stock_data = {
+                symbol: period_bars(df, period_days, selected_interval)
+                for symbol, df in (stock_data or {}).items()
+            }
+            data = stock_data.get(ticker)
+            stock_data = {
+                symbol: df for symbol, df in stock_data.items() if not df.empty
+            }
+            if stock_data:
+                td_frames = cached_tdsequential_batch(stock_data)
+        else:
+            data = period_bars(
+                get_stock_data(
+                    ticker, start_date.date(), end_date.date(), selected_interval
+                ),
+                period_days,
+                selected_interval,
             )
 
+        st.session_state.pop("analysis", None)
+        if data is not None and not data.empty:
             # Apply TD Sequential calculation
-            td_data = calculate_tdsequential(data, stock_name=ticker)
+            td_data = td_frames.get(ticker)
+            if td_data is None:
+                td_data = cached_tdsequential(data, ticker)
 
             # Apply strategy
-            strategy_type = "dabak"  # Could make configurable
-            df_strategy = apply_simple_strategy(
+            df_strategy = cached_strategy(
                 td_data,
-                initial_capital=initial_capital,
-                strategy_type=strategy_type,
+                initial_capital,
+                strategy_type,
                 fast_period=20,  # Could make configurable
                 slow_period=50,  # Could make configurable
             )
 
             # Calculate metrics
-            metrics = calculate_performance_metrics(
-                df_strategy, initial_capital=initial_capital
-            )
-
-            # Create visualizations
-            title = f"{ticker} Trading Performance:"
-            equity_fig, metrics_fig = create_performance_plots(
-                df_strategy, metrics, title
-            )
-
-            # Plot candlestick chart with TD Sequential indicators
-            td_fig = plot_tdsequential(
-                td_data,
-                stock_name=ticker,
-                window=1000,
-                show_support_resistance=show_support_resistance,
-                show_setup_stop_loss=show_setup_stop_loss,
-                show_countdown_stop_loss=show_countdown_stop_loss,
-            )
+            metrics = cached_performance_metrics(df_strategy, initial_capital)
+
+            st.session_state.analysis = {
+                "key": analysis_key,
+                "td_data": td_data,
+                "df_strategy": df_strategy,
+                "metrics": metrics,
+                "info": info_future.result(),
+                "comparison": (
+                    comparison_table(td_frames) if len(td_frames) > 1 else None
+                ),
+            }
+
+    # Display the results of the last analysis while its settings are selected
+    analysis = st.session_state.get("analysis")
+    if analysis is not None and analysis["key"] == analysis_key:
+        # Display data information
+        st.header(f"{ticker} {t.get('analysis', 'Analysis')}")
+        st.write(
+            f"{t.get('period', 'Period')}: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+        )
+        st.write(
+            f"{t.get('interval', 'Interval')}: {INTERVAL_NAMES[selected_interval]}"
+        )
 
-            # Create tabs for different views
-            tab1, tab2, tab3, tab4 = st.tabs(
-                [
-                    t.get("tab_chart", "TD Sequential Chart"),
-                    t.get("tab_data", "Data Table"),
-                    t.get("tab_equity", "Equity Curve"),
-                    t.get("tab_metrics", "Performance Metrics"),
-                ]
+        # Display the latest values of the compared symbols
+        if analysis["comparison"] is not None:
+            st.subheader(t.get("symbol_comparison", "Symbol Comparison"))
+            st.dataframe(
+                analysis["comparison"],
+                use_container_width=True,
+                column_config=DISPLAY_COLUMN_CONFIG,
             )
 
-            with tab1:
-                st.plotly_chart(td_fig, use_container_width=True)
-
-            with tab2:
-                st.write("Current Price:", info.get('currentPrice', 'N/A'))
-                st.dataframe(df_strategy, use_container_width=True)
-
-            with tab3:
-                st.plotly_chart(equity_fig, use_container_width=True)
-
-            with tab4:
-                st.plotly_chart(metrics_fig, use_container_width=True)
+        # Display the chart, data, equity curve and metrics tabs
+        render_analysis_tabs(
+            t,
+            ticker,
+            analysis["td_data"],
+            analysis["df_strategy"],
+            analysis["metrics"],
+            analysis["info"],
+        )
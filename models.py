@@ -1,8 +1,20 @@
 import peewee as pw
 from datetime import date
+from playhouse.migrate import SqliteMigrator, migrate
 
-# Create a database
-db = pw.SqliteDatabase("yatmaz_robot.db")
+# Create a database. WAL journaling lets the page readers run while a write
+# is in progress, and with synchronous=normal a commit no longer waits for
+# every write to reach the disk (WAL keeps the database consistent)
+db = pw.SqliteDatabase(
+    "yatmaz_robot.db",
+    pragmas={
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -64000,  # 64 MB page cache
+        "foreign_keys": 1,
+        "mmap_size": 256 * 1024 * 1024,
+    },
+)
 
 
 # Base Model
@@ -24,6 +36,20 @@ class User(BaseModel):
         return f"{self.nick_name} ({self.real_name})"
 
 
+# Price stored as a whole number of cents, so reads and writes skip the
+# Decimal conversion of DecimalField and compare as integers in SQLite
+class CentsField(pw.IntegerField):
+    def db_value(self, value):
+        if value is None:
+            return None
+        return int(round(float(value) * 100))
+
+    def python_value(self, value):
+        if value is None:
+            return None
+        return value / 100
+
+
 # Stock/Asset Model
 class StockAsset(BaseModel):
     stock_asset_id = pw.AutoField(
@@ -33,20 +59,63 @@ class StockAsset(BaseModel):
     stock_asset_code = pw.CharField(max_length=20)
     stock_asset_name = pw.CharField(max_length=100)
     buy_date = pw.DateField(default=date.today)
-    buy_price = pw.DecimalField(decimal_places=2, auto_round=True, max_digits=10)
+    buy_price = CentsField(column_name="buy_price_cents")
     sell_date = pw.DateField(null=True)
-    sell_price = pw.DecimalField(
-        decimal_places=2, auto_round=True, max_digits=10, null=True
-    )
+    sell_price = CentsField(column_name="sell_price_cents", null=True)
     status = pw.CharField(
         max_length=20, default="Position"
     )  # Either 'Position' or 'Cash'
 
+    class Meta:
+        # Assets are looked up per user, by status or by code. Created with
+        # IF NOT EXISTS by create_tables, so existing databases get them too
+        indexes = (
+            (("user", "status"), False),
+            (("user", "stock_asset_code"), False),
+        )
+
     def __str__(self):
         return f"{self.stock_asset_code} - {self.status}"
 
 
+# Add several assets in a single transaction, so the rows are written with
+# one commit instead of one per row
+def bulk_add_assets(rows, batch_size=100):
+    """Insert asset rows, given as dicts of StockAsset field values"""
+    with db.atomic():
+        for batch in pw.chunked(rows, batch_size):
+            StockAsset.insert_many(batch).execute()
+
+
+# Move prices of databases created with the decimal price columns to cents
+def migrate_prices_to_cents():
+    columns = [column.name for column in db.get_columns("stockasset")]
+    if "buy_price" not in columns:
+        return
+
+    migrator = SqliteMigrator(db)
+    with db.atomic():
+        migrate(
+            migrator.add_column(
+                "stockasset", "buy_price_cents", pw.IntegerField(default=0)
+            ),
+            migrator.add_column(
+                "stockasset", "sell_price_cents", pw.IntegerField(null=True)
+            ),
+        )
+        db.execute_sql(
+            "UPDATE stockasset SET "
+            "buy_price_cents = CAST(ROUND(buy_price * 100) AS INTEGER), "
+            "sell_price_cents = CAST(ROUND(sell_price * 100) AS INTEGER)"
+        )
+        migrate(
+            migrator.drop_column("stockasset", "buy_price"),
+            migrator.drop_column("stockasset", "sell_price"),
+        )
+
+
 # Create tables if they don't exist
 def create_tables():
     with db:
         db.create_tables([User, StockAsset], safe=True)
+        migrate_prices_to_cents()
@@ -1,8 +1,48 @@
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, time
+from types import MappingProxyType
+
+# Above this many plotted bars the individual numbers are unreadable, so only
+# completed setups (9) and countdowns (13) are labelled
+MAX_BARS_ALL_LABELS = 2000
+
+# Columns read by the chart, any other columns of the data are not extracted
+PLOT_COLUMNS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "buy_setup",
+    "sell_setup",
+    "buy_countdown",
+    "sell_countdown",
+    "perfect_buy_9",
+    "perfect_sell_9",
+    "perfect_buy_13",
+    "perfect_sell_13",
+    "buy_tdst_level",
+    "sell_tdst_level",
+    "buy_tdst_active",
+    "sell_tdst_active",
+    "buy_setup_stop",
+    "sell_setup_stop",
+    "buy_setup_stop_active",
+    "sell_setup_stop_active",
+    "buy_countdown_stop",
+    "sell_countdown_stop",
+    "buy_countdown_stop_active",
+    "sell_countdown_stop_active",
+)
+
+# Label color and signal marker fill of each side
+SIDE_COLORS = MappingProxyType(
+    {
+        "buy": ("rgb(0,168,107)", "rgba(0,168,107,0.4)"),
+        "sell": ("rgb(220,39,39)", "rgba(220,39,39,0.4)"),
+    }
+)
 
 
 def plot_tdsequential(
@@ -17,6 +57,7 @@ def plot_tdsequential(
     hide_weekends=True,
     hide_holidays=True,
     holidays=None,  # List of holiday dates as strings 'YYYY-MM-DD' or datetime objects
+    max_bars=5000,
 ):
     """
     Plot TD Sequential indicators on a candlestick chart with TDST levels and improved readability.
@@ -47,57 +88,74 @@ def plot_tdsequential(
         Whether to hide holidays, default is True
     holidays : list, optional
         List of holiday dates as strings 'YYYY-MM-DD' or datetime objects
+    max_bars : int, optional
+        Maximum number of candlesticks to draw, default is 5000. Longer windows
+        merge consecutive bars into one candlestick, TD Sequential numbers and
+        levels are still placed on the original bars
 
     Returns:
     --------
     plotly.graph_objects.Figure
         Plotly figure object
     """
-    # Make a copy and limit to the window size
-    if len(df) > window:
-        plot_df = df.iloc[-window:].copy()
-    else:
-        plot_df = df.copy()
+    # Limit to the window size, the plotted data is only read so no copy is made
+    plot_df = df.iloc[-window:] if len(df) > window else df
 
     # Get date column or index for x-axis and determine data type
     x, index_type = get_x_axis_values(plot_df)
 
-    # Create a single subplot with more vertical space
-    fig = make_subplots(rows=1, cols=1, vertical_spacing=0.02)
+    # The chart has a single pane, a plain figure needs no subplot grid
+    fig = go.Figure()
+
+    # Extract the column arrays once for all of the level and label helpers
+    columns = {
+        col: plot_df[col].to_numpy() for col in PLOT_COLUMNS if col in plot_df
+    }
 
     # Add candlestick chart
-    add_candlestick_chart(fig, x, plot_df)
+    add_candlestick_chart(fig, x, columns, max_bars)
 
-    # Calculate price range for annotation positioning
-    price_range = plot_df["high"].max() - plot_df["low"].min()
+    # Calculate price range for annotation positioning, an empty window has
+    # no range (reducing its empty arrays would raise)
+    price_range = (
+        columns["high"].max() - columns["low"].min() if len(plot_df) else np.nan
+    )
     annotation_params = calculate_annotation_parameters(price_range)
 
-    # Dictionary to track position conflicts (avoid overlapping annotations)
-    annotation_positions = {}
+    # WebGL traces render many more points, but plotly does not support them
+    # on an x-axis with rangebreaks (hidden weekends or non-trading hours)
+    has_rangebreaks = index_type != "numeric" and (
+        hide_weekends or (index_type == "datetime" and hide_non_trading_hours)
+    )
+    scatter = go.Scatter if has_rangebreaks else go.Scattergl
 
     # Add TDST levels as discontinuous lines with proper cancellation (if enabled)
     if show_support_resistance:
-        add_tdst_levels(fig, plot_df, x)
+        add_tdst_levels(fig, columns, x, scatter)
 
     # Add Buy Setup Stop levels and Sell Setup Stop levels as discontinuous lines (if enabled)
     if show_setup_stop_loss:
-        add_setup_stop_levels(fig, plot_df, x)
+        add_setup_stop_levels(fig, columns, x, scatter)
 
     # Add Buy Countdown Stop levels and Sell Countdown Stop levels as discontinuous lines (if enabled)
     if show_countdown_stop_loss:
-        add_countdown_stop_levels(fig, plot_df, x)
+        add_countdown_stop_levels(fig, columns, x, scatter)
 
     # Add Buy and Sell Setup annotations (above candlesticks)
-    add_setup_annotations(fig, plot_df, x, annotation_params, annotation_positions)
+    add_setup_annotations(fig, columns, x, annotation_params, scatter)
 
     # Add Buy and Sell Countdown annotations (below candlesticks)
-    add_countdown_annotations(fig, plot_df, x, annotation_params, annotation_positions)
+    add_countdown_annotations(fig, columns, x, annotation_params, scatter)
 
     # Create a legend and add title
-    add_legend(
-        fig, show_support_resistance, show_setup_stop_loss, show_countdown_stop_loss
+    legend_shapes, legend_annotations = legend_layout(
+        show_support_resistance, show_setup_stop_loss, show_countdown_stop_loss
     )
 
+    # Set all annotations and shapes at once. Plotly validates the whole
+    # annotation tuple again on each add_annotation call
+    fig.update_layout(annotations=legend_annotations, shapes=legend_shapes)
+
     # Update layout with proper x-axis formatting based on index type
     update_layout(
         fig,
@@ -125,36 +183,45 @@ def get_x_axis_values(plot_df):
     """
     if isinstance(plot_df.index, pd.DatetimeIndex):
         # Check if all times are midnight (indicating date-only data)
-        has_time_component = any(
-            idx.time() != time(0, 0) for idx in plot_df.index if not pd.isna(idx)
-        )
-        if has_time_component:
+        if has_time_component(plot_df.index):
             return plot_df.index, "datetime"
         else:
             return plot_df.index, "date"
     elif "date" in plot_df.columns:
+        # Index-like values, so the plot helpers can select bars by position
         if pd.api.types.is_datetime64_any_dtype(plot_df["date"]):
+            dates = pd.DatetimeIndex(plot_df["date"])
             # Check if all times are midnight (indicating date-only data)
-            has_time_component = any(
-                idx.time() != time(0, 0) for idx in plot_df["date"] if not pd.isna(idx)
-            )
-            if has_time_component:
-                return plot_df["date"], "datetime"
+            if has_time_component(dates):
+                return dates, "datetime"
             else:
-                return plot_df["date"], "date"
-        return plot_df["date"], "date"
+                return dates, "date"
+        return plot_df["date"].to_numpy(), "date"
     else:
         return np.arange(len(plot_df)), "numeric"
 
 
-def add_candlestick_chart(fig, x, plot_df):
-    """Add candlestick chart to the figure"""
+def has_time_component(index):
+    """Check whether any timestamp of a DatetimeIndex is not at midnight"""
+    valid = index[~index.isna()]
+    return bool((valid != valid.normalize()).any())
+
+
+def add_candlestick_chart(fig, x, columns, max_bars=None):
+    """Add candlestick chart to the figure, with at most max_bars candlesticks"""
+    if max_bars and len(x) > max_bars:
+        x, open_, high, low, close = merge_candles(x, columns, max_bars)
+    else:
+        open_, high, low, close = (
+            columns[col] for col in ("open", "high", "low", "close")
+        )
+
     candlestick = go.Candlestick(
         x=x,
-        open=plot_df["open"],
-        high=plot_df["high"],
-        low=plot_df["low"],
-        close=plot_df["close"],
+        open=open_,
+        high=high,
+        low=low,
+        close=close,
         name="Price",
         showlegend=False,
         increasing=dict(line=dict(width=1.5), fillcolor="rgba(0,168,107,0.6)"),
@@ -163,6 +230,31 @@ def add_candlestick_chart(fig, x, plot_df):
     fig.add_trace(candlestick)
 
 
+def merge_candles(x, columns, max_bars):
+    """
+    Merge runs of consecutive bars into single candlesticks, so that at most
+    max_bars remain. The browser draws each candlestick at most a pixel wide
+    on such long charts, so merging loses no visible detail.
+
+    Returns:
+    --------
+    tuple: (x, open, high, low, close)
+        Values of the merged candlesticks, each placed at the first bar of
+        its run
+    """
+    n = len(x)
+    bars_per_candle = -(-n // max_bars)
+    starts = np.arange(0, n, bars_per_candle)
+    ends = np.minimum(starts + bars_per_candle, n) - 1
+    return (
+        x[starts],
+        columns["open"][starts],
+        np.maximum.reduceat(columns["high"], starts),
+        np.minimum.reduceat(columns["low"], starts),
+        columns["close"][ends],
+    )
+
+
 def calculate_annotation_parameters(price_range):
     """Calculate parameters for annotations based on price range"""
     return {
@@ -172,117 +264,96 @@ def calculate_annotation_parameters(price_range):
     }
 
 
-def get_adjusted_position(idx, y_position, is_above, annotation_positions):
-    """Handle potential annotation overlaps"""
-    key = (idx, is_above)
-    if key in annotation_positions:
-        # If this position is already taken, adjust by a small amount
-        if is_above:
-            y_position += annotation_positions.get("setup_offset", 0)
-        else:
-            y_position -= annotation_positions.get("countdown_offset", 0)
-        annotation_positions[key] = y_position
-    else:
-        annotation_positions[key] = y_position
-    return y_position
-
-
-def add_tdst_levels(fig, plot_df, x):
+def add_tdst_levels(fig, columns, x, scatter=go.Scatter):
     """Add TDST support and resistance levels to the figure"""
     # Process buy TDST levels (resistance)
-    if "buy_tdst_level" in plot_df.columns and "buy_tdst_active" in plot_df.columns:
+    if "buy_tdst_level" in columns and "buy_tdst_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="buy_tdst_level",
             active_column="buy_tdst_active",
             color="rgba(0,168,107,0.7)",
             name="Buy TDST",
+            scatter=scatter,
         )
 
     # Process sell TDST levels (support)
-    if "sell_tdst_level" in plot_df.columns and "sell_tdst_active" in plot_df.columns:
+    if "sell_tdst_level" in columns and "sell_tdst_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="sell_tdst_level",
             active_column="sell_tdst_active",
             color="rgba(220,39,39,0.7)",
             name="Sell TDST",
+            scatter=scatter,
         )
 
 
-def add_setup_stop_levels(fig, plot_df, x):
+def add_setup_stop_levels(fig, columns, x, scatter=go.Scatter):
     """Add setup stop loss levels to the figure"""
     # Process buy stop levels (support)
-    if (
-        "buy_setup_stop" in plot_df.columns
-        and "buy_setup_stop_active" in plot_df.columns
-    ):
+    if "buy_setup_stop" in columns and "buy_setup_stop_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="buy_setup_stop",
             active_column="buy_setup_stop_active",
             color="rgba(128,0,128,0.7)",  # Purple
             name="Buy Setup Stop",
+            scatter=scatter,
             price_column="close",
             check_price_below=True,
         )
 
     # Process sell stop levels (resistance)
-    if (
-        "sell_setup_stop" in plot_df.columns
-        and "sell_setup_stop_active" in plot_df.columns
-    ):
+    if "sell_setup_stop" in columns and "sell_setup_stop_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="sell_setup_stop",
             active_column="sell_setup_stop_active",
             color="rgba(255,165,0,0.7)",  # Orange
             name="Sell Setup Stop",
+            scatter=scatter,
             price_column="close",
             check_price_above=True,
         )
 
 
-def add_countdown_stop_levels(fig, plot_df, x):
+def add_countdown_stop_levels(fig, columns, x, scatter=go.Scatter):
     """Add countdown stop loss levels to the figure"""
     # Process buy countdown stop levels (support)
-    if (
-        "buy_countdown_stop" in plot_df.columns
-        and "buy_countdown_stop_active" in plot_df.columns
-    ):
+    if "buy_countdown_stop" in columns and "buy_countdown_stop_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="buy_countdown_stop",
             active_column="buy_countdown_stop_active",
             color="rgba(0,0,255,0.7)",  # Blue
             name="Buy Countdown Stop",
+            scatter=scatter,
             price_column="close",
             check_price_below=True,
         )
 
     # Process sell countdown stop levels (resistance)
-    if (
-        "sell_countdown_stop" in plot_df.columns
-        and "sell_countdown_stop_active" in plot_df.columns
-    ):
+    if "sell_countdown_stop" in columns and "sell_countdown_stop_active" in columns:
         add_discontinuous_levels(
             fig,
-            plot_df,
+            columns,
             x,
             level_column="sell_countdown_stop",
             active_column="sell_countdown_stop_active",
             color="rgba(0,0,255,0.7)",  # Blue
             name="Sell Countdown Stop",
+            scatter=scatter,
             price_column="close",
             check_price_above=True,
         )
@@ -290,7 +361,7 @@ def add_countdown_stop_levels(fig, plot_df, x):
 
 def add_discontinuous_levels(
     fig,
-    plot_df,
+    columns,
     x,
     level_column,
     active_column,
@@ -299,6 +370,7 @@ def add_discontinuous_levels(
     price_column=None,
     check_price_below=False,
     check_price_above=False,
+    scatter=go.Scatter,
 ):
     """
     Add discontinuous horizontal levels (TDST or stop levels) to the figure
@@ -307,9 +379,9 @@ def add_discontinuous_levels(
     -----------
     fig : plotly.graph_objects.Figure
         Figure to add levels to
-    plot_df : pandas.DataFrame
-        DataFrame with the data
-    x : array-like
+    columns : dict
+        NumPy arrays of the plotted bars, keyed by column name
+    x : pandas.DatetimeIndex or numpy.ndarray
         X-axis values
     level_column : str
         Column name for the level values
@@ -325,364 +397,272 @@ def add_discontinuous_levels(
         Whether to check if price is below the level
     check_price_above : bool, optional
         Whether to check if price is above the level
+    scatter : type, optional
+        Trace class of the lines, go.Scatter or go.Scattergl
     """
-    segments = []
-    current_segment = None
-
-    for i, row in plot_df.iterrows():
-        # Skip if not active or level is NaN
-        if not row[active_column] or pd.isna(row[level_column]):
-            if current_segment is not None:
-                segments.append(current_segment)
-                current_segment = None
-            continue
-
-        # Check price conditions if specified
-        if check_price_below and price_column and row[price_column] < row[level_column]:
-            if current_segment is not None:
-                segments.append(current_segment)
-                current_segment = None
-            continue
-
-        if check_price_above and price_column and row[price_column] > row[level_column]:
-            if current_segment is not None:
-                segments.append(current_segment)
-                current_segment = None
-            continue
-
-        # Start a new segment or continue the current one
-        if current_segment is None:
-            current_segment = {
-                "start": i,
-                "end": i,
-                "level": row[level_column],
-            }
-        else:
-            if row[level_column] == current_segment["level"]:
-                current_segment["end"] = i
-            else:
-                segments.append(current_segment)
-                current_segment = {
-                    "start": i,
-                    "end": i,
-                    "level": row[level_column],
-                }
-
-    # Add the last segment if there is one
-    if current_segment is not None:
-        segments.append(current_segment)
-
-    # Add all segments to the figure
-    for segment in segments:
-        # Convert index to x values if needed
-        start_x = (
-            x[plot_df.index.get_loc(segment["start"])]
-            if isinstance(x, pd.DatetimeIndex)
-            else segment["start"]
-        )
-        end_x = (
-            x[plot_df.index.get_loc(segment["end"])]
-            if isinstance(x, pd.DatetimeIndex)
-            else segment["end"]
-        )
-
-        fig.add_trace(
-            go.Scatter(
-                x=[start_x, end_x],
-                y=[segment["level"], segment["level"]],
-                mode="lines",
-                line=dict(color=color, width=1, dash="dash"),
-                name=name,
-                showlegend=False,
-                hoverinfo="y+name",
-            )
+    level = columns[level_column].astype(float)
+
+    # A bar carries a level only if it is active and the level is defined
+    valid = columns[active_column].astype(bool) & ~np.isnan(level)
+
+    # Drop bars where the price has already crossed the level
+    if price_column:
+        price = columns[price_column].astype(float)
+        if check_price_below:
+            valid &= ~(price < level)
+        if check_price_above:
+            valid &= ~(price > level)
+
+    # A segment continues while consecutive bars keep the same level
+    continues = valid[1:] & valid[:-1] & (level[1:] == level[:-1])
+    start_pos = np.flatnonzero(valid & ~np.concatenate(([False], continues)))
+    end_pos = np.flatnonzero(valid & ~np.concatenate((continues, [False])))
+
+    if len(start_pos) == 0:
+        return
+
+    # Draw all segments as one polyline, separated by None gaps. Only the
+    # segment ends are converted to objects, not every bar of the x-axis
+    xs = np.empty(len(start_pos) * 3, dtype=object)
+    xs[0::3] = np.asarray(x[start_pos], dtype=object)
+    xs[1::3] = np.asarray(x[end_pos], dtype=object)
+    ys = np.empty(len(start_pos) * 3, dtype=object)
+    ys[0::3] = level[start_pos]
+    ys[1::3] = level[start_pos]
+
+    fig.add_trace(
+        scatter(
+            x=xs,
+            y=ys,
+            mode="lines",
+            line=dict(color=color, width=1, dash="dash"),
+            name=name,
+            showlegend=False,
+            hoverinfo="y+name",
+            connectgaps=False,
         )
+    )
 
 
-def add_setup_annotations(fig, plot_df, x, annotation_params, annotation_positions):
+def add_setup_annotations(fig, columns, x, annotation_params, scatter=go.Scatter):
     """Add Buy and Sell Setup annotations above candlesticks"""
-    add_buy_setup_annotations(fig, plot_df, x, annotation_params, annotation_positions)
-    add_sell_setup_annotations(fig, plot_df, x, annotation_params, annotation_positions)
-
-
-def add_buy_setup_annotations(fig, plot_df, x, annotation_params, annotation_positions):
-    """Add Buy Setup annotations above candlesticks"""
-    setup_offset = annotation_params["setup_offset"]
-    signal_offset = annotation_params["signal_offset"]
-
-    for i, row in plot_df.iterrows():
-        idx = x[plot_df.index.get_loc(i)] if isinstance(x, pd.DatetimeIndex) else i
+    for side, (color, bgcolor) in SIDE_COLORS.items():
+        add_setup_side_annotations(
+            fig, columns, x, annotation_params, side, color, bgcolor, scatter
+        )
 
-        # Show all setup numbers
-        if row["buy_setup"] > 0:
-            y_pos = get_adjusted_position(
-                idx, row["high"] + setup_offset, True, annotation_positions
-            )
-            # Make higher numbers more prominent
-            font_size = 10 + min(2, row["buy_setup"] - 1)
-            fig.add_annotation(
-                x=idx,
-                y=y_pos,
-                text=str(int(row["buy_setup"])),
-                showarrow=False,
-                font=dict(color="rgb(0,168,107)", size=font_size, family="Arial"),
-                opacity=0.9,
-            )
 
-        # Add annotations for normal buy setup 9s
-        if row["buy_setup"] == 9 and row.get("perfect_buy_9", 0) != 1:
-            fig.add_annotation(
-                x=idx,
-                y=row["high"] + signal_offset,
-                text="BUY 9",
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor="rgb(0,168,107)",
-                font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                bgcolor="rgba(0,168,107,0.4)",  # More transparent
-                borderpad=3,
-                borderwidth=0,
-                opacity=0.7,  # More transparent
-            )
+def add_label_trace(fig, x, y, values, font_sizes, color, name, scatter=go.Scatter):
+    """
+    Add a category of TD Sequential numbers as a single text trace
 
-        # Highlight perfect buy setup 9s with "BUY M9" text
-        if row["buy_setup"] == 9 and row.get("perfect_buy_9", 0) == 1:
-            fig.add_annotation(
-                x=idx,
-                y=row["high"] + signal_offset,
-                text="BUY M9",  # Changed text format to BUY M9
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor="rgb(0,168,107)",
-                font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                bgcolor="rgba(0,168,107,0.4)",  # More transparent
-                borderpad=3,
-                borderwidth=0,
-                opacity=0.7,  # More transparent
-            )
+    Parameters:
+    -----------
+    fig : plotly.graph_objects.Figure
+        Figure to add the labels to
+    x : array-like
+        X positions of the labels
+    y : array-like
+        Y positions of the labels
+    values : numpy.ndarray
+        Setup or countdown numbers to display
+    font_sizes : numpy.ndarray
+        Font size of each label
+    color : str
+        Font color of the labels
+    name : str
+        Name of the trace
+    scatter : type, optional
+        Trace class of the labels, go.Scatter or go.Scattergl
+    """
+    fig.add_trace(
+        scatter(
+            x=x,
+            y=y,
+            mode="text",
+            text=values.astype(str),
+            textposition="middle center",
+            textfont=dict(color=color, size=font_sizes.tolist(), family="Arial"),
+            opacity=0.9,
+            name=name,
+            showlegend=False,
+            hoverinfo="skip",
+        )
+    )
 
 
-def add_sell_setup_annotations(
-    fig, plot_df, x, annotation_params, annotation_positions
+def add_signal_trace(
+    fig, x, y, text, color, bgcolor, symbol, textposition, name, scatter=go.Scatter
 ):
-    """Add Sell Setup annotations above candlesticks"""
-    setup_offset = annotation_params["setup_offset"]
-    signal_offset = annotation_params["signal_offset"]
-
-    for i, row in plot_df.iterrows():
-        idx = x[plot_df.index.get_loc(i)] if isinstance(x, pd.DatetimeIndex) else i
-
-        # Show all setup numbers
-        if row["sell_setup"] > 0:
-            y_pos = get_adjusted_position(
-                idx, row["high"] + setup_offset, True, annotation_positions
-            )
-            # Make higher numbers more prominent
-            font_size = 10 + min(2, row["sell_setup"] - 1)
-            fig.add_annotation(
-                x=idx,
-                y=y_pos,
-                text=str(int(row["sell_setup"])),
-                showarrow=False,
-                font=dict(color="rgb(220,39,39)", size=font_size, family="Arial"),
-                opacity=0.9,
-            )
-
-        # Add annotations for normal sell setup 9s
-        if row["sell_setup"] == 9 and row.get("perfect_sell_9", 0) != 1:
-            fig.add_annotation(
-                x=idx,
-                y=row["high"] + signal_offset,
-                text="SELL 9",
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor="rgb(220,39,39)",
-                font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                bgcolor="rgba(220,39,39,0.4)",  # More transparent
-                borderpad=3,
-                borderwidth=0,
-                opacity=0.7,  # More transparent
-            )
-
-        # Highlight perfect sell setup 9s with "SELL M9" text
-        if row["sell_setup"] == 9 and row.get("perfect_sell_9", 0) == 1:
-            fig.add_annotation(
-                x=idx,
-                y=row["high"] + signal_offset,
-                text="SELL M9",  # Changed text format to SELL M9
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor="rgb(220,39,39)",
-                font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                bgcolor="rgba(220,39,39,0.4)",  # More transparent
-                borderpad=3,
-                borderwidth=0,
-                opacity=0.7,  # More transparent
-            )
-
+    """
+    Add the 9 or 13 signals of one side as a single marker and text trace.
+    A trace is drawn in one pass, while every arrowed annotation is a
+    separate element in the browser.
 
-def add_countdown_annotations(fig, plot_df, x, annotation_params, annotation_positions):
-    """Add Buy and Sell Countdown annotations below candlesticks"""
-    add_buy_countdown_annotations(
-        fig, plot_df, x, annotation_params, annotation_positions
-    )
-    add_sell_countdown_annotations(
-        fig, plot_df, x, annotation_params, annotation_positions
+    Parameters:
+    -----------
+    fig : plotly.graph_objects.Figure
+        Figure to add the signals to
+    x : array-like
+        X positions of the signals
+    y : array-like
+        Y positions of the signal markers
+    text : numpy.ndarray of str
+        Signal text of each marker, e.g. "BUY 9" or "BUY M9"
+    color : str
+        Outline color of the markers
+    bgcolor : str
+        Fill color of the markers
+    symbol : str
+        Marker symbol, pointing towards the candlesticks
+    textposition : str
+        Position of the text, on the marker side away from the candlesticks
+    name : str
+        Name of the trace
+    scatter : type, optional
+        Trace class of the signals, go.Scatter or go.Scattergl
+    """
+    fig.add_trace(
+        scatter(
+            x=x,
+            y=y,
+            mode="markers+text",
+            text=text,
+            textposition=textposition,
+            textfont=dict(color="white", size=9, family="Arial"),  # Smaller font
+            marker=dict(
+                symbol=symbol, size=14, color=bgcolor, line=dict(color=color, width=1)
+            ),
+            opacity=0.7,  # More transparent
+            name=name,
+            showlegend=False,
+            hoverinfo="text",
+        )
     )
 
 
-def add_buy_countdown_annotations(
-    fig, plot_df, x, annotation_params, annotation_positions
+def add_setup_side_annotations(
+    fig, columns, x, annotation_params, side, color, bgcolor, scatter=go.Scatter
 ):
-    """Add Buy Countdown annotations below candlesticks"""
-    countdown_offset = annotation_params["countdown_offset"]
-    signal_offset = annotation_params["signal_offset"]
+    """Add the setup numbers and 9 signals of one side above candlesticks"""
+    high = columns["high"]
 
-    # Track the last countdown numbers to detect repeats
-    last_buy_countdown = None
+    # Positions of the labelled bars, shared by all of the arrays below
+    setup = columns[f"{side}_setup"]
+    if len(setup) > MAX_BARS_ALL_LABELS:
+        pos = np.flatnonzero(setup == 9)
+    else:
+        pos = np.flatnonzero(setup > 0)
 
-    for i, row in plot_df.iterrows():
-        idx = x[plot_df.index.get_loc(i)] if isinstance(x, pd.DatetimeIndex) else i
+    # Skip the traces of a side without setup bars in the window
+    if len(pos) == 0:
+        return
+    setup = setup[pos]
 
-        # Only show the first occurrence of each countdown number
-        if row["buy_countdown"] > 0 and row["buy_countdown"] != last_buy_countdown:
-            y_pos = get_adjusted_position(
-                idx, row["low"] - countdown_offset, False, annotation_positions
-            )
-            font_size = 10 + min(2, row["buy_countdown"] // 5)
-            fig.add_annotation(
-                x=idx,
-                y=y_pos,
-                text=str(int(row["buy_countdown"])),
-                showarrow=False,
-                font=dict(color="rgb(0,168,107)", size=font_size, family="Arial"),
-                opacity=0.9,
-            )
+    # Show the setup numbers, making higher numbers more prominent
+    add_label_trace(
+        fig,
+        x[pos],
+        high[pos] + annotation_params["setup_offset"],
+        setup.astype(int),
+        10 + np.minimum(2, setup - 1),
+        color,
+        f"{side.capitalize()} Setup",
+        scatter,
+    )
 
-            # Add annotations for normal buy countdown 13s
-            if row["buy_countdown"] == 13 and row.get("perfect_buy_13", 0) != 1:
-                fig.add_annotation(
-                    x=idx,
-                    y=row["low"] - signal_offset,
-                    text="BUY 13",
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=2,
-                    arrowcolor="rgb(0,168,107)",
-                    font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                    bgcolor="rgba(0,168,107,0.4)",  # More transparent
-                    borderpad=3,
-                    borderwidth=0,
-                    opacity=0.7,  # More transparent
-                )
+    # Normal setup 9s and perfect setup 9s (shown as M9)
+    signal_pos = pos[setup == 9]
+    if len(signal_pos) == 0:
+        return
+    perfect = (
+        columns[f"perfect_{side}_9"][signal_pos] == 1
+        if f"perfect_{side}_9" in columns
+        else np.zeros(len(signal_pos), dtype=bool)
+    )
+    add_signal_trace(
+        fig,
+        x[signal_pos],
+        high[signal_pos] + annotation_params["signal_offset"],
+        np.where(perfect, f"{side.upper()} M9", f"{side.upper()} 9"),
+        color,
+        bgcolor,
+        "triangle-down",
+        "top center",
+        f"{side.capitalize()} Setup Signal",
+        scatter,
+    )
 
-            # Highlight perfect buy countdown 13s with "BUY M13" text
-            if row["buy_countdown"] == 13 and row.get("perfect_buy_13", 0) == 1:
-                fig.add_annotation(
-                    x=idx,
-                    y=row["low"] - signal_offset,
-                    text="BUY M13",  # Changed text format to BUY M13
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=2,
-                    arrowcolor="rgb(0,168,107)",
-                    font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                    bgcolor="rgba(0,168,107,0.4)",  # More transparent
-                    borderpad=3,
-                    borderwidth=0,
-                    opacity=0.7,  # More transparent
-                )
 
-        # Update the last countdown number
-        last_buy_countdown = row["buy_countdown"] if row["buy_countdown"] > 0 else None
+def add_countdown_annotations(fig, columns, x, annotation_params, scatter=go.Scatter):
+    """Add Buy and Sell Countdown annotations below candlesticks"""
+    for side, (color, bgcolor) in SIDE_COLORS.items():
+        add_countdown_side_annotations(
+            fig, columns, x, annotation_params, side, color, bgcolor, scatter
+        )
 
 
-def add_sell_countdown_annotations(
-    fig, plot_df, x, annotation_params, annotation_positions
+def add_countdown_side_annotations(
+    fig, columns, x, annotation_params, side, color, bgcolor, scatter=go.Scatter
 ):
-    """Add Sell Countdown annotations below candlesticks"""
-    countdown_offset = annotation_params["countdown_offset"]
-    signal_offset = annotation_params["signal_offset"]
-
-    # Track the last countdown numbers to detect repeats
-    last_sell_countdown = None
-
-    for i, row in plot_df.iterrows():
-        idx = x[plot_df.index.get_loc(i)] if isinstance(x, pd.DatetimeIndex) else i
-
-        # Only show the first occurrence of each countdown number
-        if row["sell_countdown"] > 0 and row["sell_countdown"] != last_sell_countdown:
-            y_pos = get_adjusted_position(
-                idx, row["low"] - countdown_offset, False, annotation_positions
-            )
-            font_size = 10 + min(2, row["sell_countdown"] // 5)
-            fig.add_annotation(
-                x=idx,
-                y=y_pos,
-                text=str(int(row["sell_countdown"])),
-                showarrow=False,
-                font=dict(color="rgb(220,39,39)", size=font_size, family="Arial"),
-                opacity=0.9,
-            )
-
-            # Add annotations for normal sell countdown 13s
-            if row["sell_countdown"] == 13 and row.get("perfect_sell_13", 0) != 1:
-                fig.add_annotation(
-                    x=idx,
-                    y=row["low"] - signal_offset,
-                    text="SELL 13",
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=2,
-                    arrowcolor="rgb(220,39,39)",
-                    font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                    bgcolor="rgba(220,39,39,0.4)",  # More transparent
-                    borderpad=3,
-                    borderwidth=0,
-                    opacity=0.7,  # More transparent
-                )
-
-            # Highlight perfect sell countdown 13s with "SELL M13" text
-            if row["sell_countdown"] == 13 and row.get("perfect_sell_13", 0) == 1:
-                fig.add_annotation(
-                    x=idx,
-                    y=row["low"] - signal_offset,
-                    text="SELL M13",  # Changed text format to SELL M13
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=2,
-                    arrowcolor="rgb(220,39,39)",
-                    font=dict(color="white", size=9, family="Arial"),  # Smaller font
-                    bgcolor="rgba(220,39,39,0.4)",  # More transparent
-                    borderpad=3,
-                    borderwidth=0,
-                    opacity=0.7,  # More transparent
-                )
+    """Add the countdown numbers and 13 signals of one side below candlesticks"""
+    countdown = columns[f"{side}_countdown"]
+    low = columns["low"]
+
+    # Only show the first occurrence of each countdown number, or only the
+    # completions on long charts
+    previous = np.concatenate(([0], countdown[:-1]))
+    first = (countdown > 0) & (countdown != previous)
+    if len(countdown) > MAX_BARS_ALL_LABELS:
+        first &= countdown == 13
+    pos = np.flatnonzero(first)
+
+    # Skip the traces of a side without countdown bars in the window
+    if len(pos) == 0:
+        return
+    countdown = countdown[pos]
+    add_label_trace(
+        fig,
+        x[pos],
+        low[pos] - annotation_params["countdown_offset"],
+        countdown.astype(int),
+        10 + np.minimum(2, countdown // 5),
+        color,
+        f"{side.capitalize()} Countdown",
+        scatter,
+    )
 
-        # Update the last countdown number
-        last_sell_countdown = (
-            row["sell_countdown"] if row["sell_countdown"] > 0 else None
-        )
+    # Normal countdown 13s and perfect countdown 13s (shown as M13)
+    signal_pos = pos[countdown == 13]
+    if len(signal_pos) == 0:
+        return
+    perfect = (
+        columns[f"perfect_{side}_13"][signal_pos] == 1
+        if f"perfect_{side}_13" in columns
+        else np.zeros(len(signal_pos), dtype=bool)
+    )
+    add_signal_trace(
+        fig,
+        x[signal_pos],
+        low[signal_pos] - annotation_params["signal_offset"],
+        np.where(perfect, f"{side.upper()} M13", f"{side.upper()} 13"),
+        color,
+        bgcolor,
+        "triangle-up",
+        "bottom center",
+        f"{side.capitalize()} Countdown Signal",
+        scatter,
+    )
 
 
-def add_legend(
-    fig, show_support_resistance, show_setup_stop_loss, show_countdown_stop_loss
+def legend_layout(
+    show_support_resistance, show_setup_stop_loss, show_countdown_stop_loss
 ):
-    """Add a legend to the figure"""
+    """
+    Legend of the figure, returned as lists of shape and annotation dicts
+    """
     # Create a clearer legend using shapes and annotations
-    fig.add_shape(
+    background = dict(
         type="rect",
         xref="paper",
         yref="paper",
@@ -750,8 +730,8 @@ def add_legend(
             ]
         )
 
-    for text, color, x, y in legend_texts:
-        fig.add_annotation(
+    annotations = [
+        dict(
             x=x,
             y=y,
             xref="paper",
@@ -762,6 +742,9 @@ def add_legend(
             align="left",
             bgcolor="rgba(0,0,0,0)",
         )
+        for text, color, x, y in legend_texts
+    ]
+    return [background], annotations
 
 
 def is_holiday(date, holidays):
@@ -849,6 +832,7 @@ def update_layout(
         paper_bgcolor="#121212",  # Dark paper
         hovermode="x unified",
         font=dict(family="Arial", color="#FFFFFF"),  # Light text for dark background
+        uirevision="td",  # Keep zoom and pan when the chart is recomputed
     )
 
     # Configure x-axis based on index type
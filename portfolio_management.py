@@ -1,21 +1,6 @@
 import streamlit as st
-import pandas as pd
 from datetime import date
-from models import User, StockAsset, create_tables
-import json
-import os
-
-
-def load_translations(lang):
-    """Load translations from JSON file based on selected language"""
-    try:
-        file_path = os.path.join("translations", f"{lang}.json")
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        st.error(f"Error loading translations: {e}")
-        # Return empty dict as fallback
-        return {}
+from models import User, StockAsset
 
 
 def display_portfolio_management(t):
@@ -0,0 +1,807 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, kernels then run as plain Python
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Fallback decorator returning the function unchanged"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Explicit signatures compile the kernels when this module is imported (or
+# load them from the on-disk cache) instead of on the first call. Inputs are
+# typed read-only, which also accepts writeable arrays and the read-only
+# views pandas may return from to_numpy()
+F4_IN = "Array(float32, 1, 'A', readonly=True)"
+F8_IN = "Array(float64, 1, 'A', readonly=True)"
+I8_IN = "Array(int64, 1, 'A', readonly=True)"
+B_IN = "Array(boolean, 1, 'A', readonly=True)"
+
+TD_SEQ_SIG = f"void({F4_IN}, int64[:], int64[:])"
+STOP_LEVEL_SIG = f"float64({F8_IN}, {F8_IN}, int64[:], int64)"
+TD_COUNTDOWN_SIG = (
+    f"void({F8_IN}, {F8_IN}, {F8_IN}, {I8_IN}, {I8_IN}, {F8_IN}, {F8_IN}, "
+    f"{B_IN}, {B_IN}, "
+    "int64[:], int64[:], int64[:], int64[:], int64[:], int64[:], "
+    "float64[:], float64[:])"
+)
+TDST_STOP_SIG = (
+    f"void({F8_IN}, {F8_IN}, {F8_IN}, {I8_IN}, {I8_IN}, "
+    f"{F8_IN}, {F8_IN}, {F8_IN}, {F8_IN}, "
+    "float64[:], float64[:], boolean[:], boolean[:], "
+    "float64[:], float64[:], boolean[:], boolean[:])"
+)
+FORWARD_FILL_SIG = (
+    f"void({F8_IN}, {F8_IN}, {F8_IN}, "
+    "float64[:], float64[:], boolean[:], boolean[:], "
+    "float64[:], float64[:], boolean[:], boolean[:], "
+    "float64[:], float64[:], boolean[:], boolean[:], boolean[:], boolean[:])"
+)
+COUNTDOWN_STOP_SIG = (
+    f"void({F8_IN}, {F8_IN}, {F8_IN}, {F8_IN}, "
+    "float64[:], float64[:], boolean[:], boolean[:], "
+    "boolean[:], boolean[:], boolean[:], boolean[:])"
+)
+
+
+def _td_seq_kernel(close, buy_setup, sell_setup):
+    """
+    Count Buy and Sell Setup bars in place.
+
+    A Buy (Sell) Setup bar closes below (above) the close 4 bars earlier.
+    A setup count increases while its condition holds and restarts at 1
+    after reaching 9. The count is reset to 0 when the condition fails.
+
+    Parameters:
+    -----------
+    close : numpy.ndarray of float32
+        Close prices
+    buy_setup, sell_setup : numpy.ndarray of int64
+        Output arrays, filled with the setup counts
+    """
+    # The first 4 bars have no close 4 bars earlier and keep a count of 0
+    for i in range(4, close.shape[0]):
+        # Buy Setup: Current close less than close 4 bars earlier
+        if close[i] < close[i - 4]:
+            if buy_setup[i - 1] > 0 and buy_setup[i - 1] < 9:
+                buy_setup[i] = buy_setup[i - 1] + 1
+            else:
+                buy_setup[i] = 1
+        else:
+            buy_setup[i] = 0
+
+        # Sell Setup: Current close greater than close 4 bars earlier
+        if close[i] > close[i - 4]:
+            if sell_setup[i - 1] > 0 and sell_setup[i - 1] < 9:
+                sell_setup[i] = sell_setup[i - 1] + 1
+            else:
+                sell_setup[i] = 1
+        else:
+            sell_setup[i] = 0
+
+
+def _setup_counts(condition, out):
+    """
+    Write the setup counts of the bars where condition holds into out,
+    restarting at 1 after 9.
+    """
+    positions = np.arange(condition.shape[0])
+    # Position of the latest bar where the condition failed
+    run_length = np.where(condition, -1, positions)
+    np.maximum.accumulate(run_length, out=run_length)
+    # Length of the run of bars meeting the condition up to each bar
+    np.subtract(positions, run_length, out=run_length)
+    run_length -= 1
+    run_length %= 9
+    run_length += 1
+    np.multiply(run_length, condition, out=out)
+
+
+def td_seq_vectorized(close, buy_setup, sell_setup):
+    """
+    Count Buy and Sell Setup bars in place using whole-array NumPy operations.
+
+    Gives the same counts as td_seq_kernel. Used in place of the loop when
+    numba is not installed, as the interpreted loop is much slower.
+
+    Parameters:
+    -----------
+    close : numpy.ndarray of float32
+        Close prices
+    buy_setup, sell_setup : numpy.ndarray of int64
+        Output arrays, filled with the setup counts
+    """
+    n = close.shape[0]
+    # The first 4 bars have no close 4 bars earlier and keep a count of 0
+    change = close[4:] - close[:-4]
+    condition = np.zeros(n, dtype=bool)
+
+    np.less(change, 0, out=condition[4:])
+    _setup_counts(condition, buy_setup)
+    np.greater(change, 0, out=condition[4:])
+    _setup_counts(condition, sell_setup)
+
+
+if NUMBA_AVAILABLE:
+    # JIT compiled version, cached on disk so later processes skip compilation
+    td_seq_kernel = njit(TD_SEQ_SIG, cache=True)(_td_seq_kernel)
+else:
+    td_seq_kernel = td_seq_vectorized
+
+
+def _td_seq_batch(closes, n_bars, buy_setups, sell_setups):
+    """
+    Count Buy and Sell Setup bars for several tickers in parallel.
+
+    Each row of the 2D arrays holds one ticker, padded to the longest series.
+    The setup count of a ticker only depends on its own bars, so the rows are
+    processed independently across all available cores.
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray of float32, shape (n_tickers, max_n)
+        Close prices of each ticker
+    n_bars : numpy.ndarray of int64
+        Number of valid bars of each ticker
+    buy_setups, sell_setups : numpy.ndarray of int64, shape (n_tickers, max_n)
+        Output arrays, filled with the setup counts
+    """
+    for t in prange(closes.shape[0]):
+        n = n_bars[t]
+        td_seq_kernel(closes[t, :n], buy_setups[t, :n], sell_setups[t, :n])
+
+
+# Compiled on first use: loading a parallel kernel starts numba's threading
+# layer, which can keep the process from exiting when done from Streamlit's
+# script thread, so the app calculates its comparison batches serially
+td_seq_batch = njit(parallel=True, cache=True)(_td_seq_batch)
+
+
+def _stop_level(high, low, bars, sign):
+    """
+    Stop level of a completed countdown: the extreme of its bars moved away
+    by the range of the bar that made the extreme.
+
+    sign is 1 for a sell stop (highest high plus range) and -1 for a buy
+    stop (lowest low minus range).
+    """
+    extreme_idx = bars[0]
+    for bar in bars[1:]:
+        # Strict comparison keeps the first bar when extremes are equal
+        if sign > 0 and high[bar] > high[extreme_idx]:
+            extreme_idx = bar
+        elif sign < 0 and low[bar] < low[extreme_idx]:
+            extreme_idx = bar
+
+    bar_range = high[extreme_idx] - low[extreme_idx]
+    if sign > 0:
+        return high[extreme_idx] + bar_range
+    return low[extreme_idx] - bar_range
+
+
+stop_level = njit(STOP_LEVEL_SIG, cache=True)(_stop_level)
+
+
+def _td_countdown_kernel(
+    high,
+    low,
+    close,
+    buy_setup,
+    sell_setup,
+    new_buy_tdst,
+    new_sell_tdst,
+    buy_qualifier,
+    sell_qualifier,
+    buy_countdown,
+    sell_countdown,
+    buy_countdown_active,
+    sell_countdown_active,
+    buy_bar_8_idx,
+    sell_bar_8_idx,
+    buy_completion_stop,
+    sell_completion_stop,
+):
+    """
+    Run the Buy and Sell Countdown state machine in place.
+
+    A completed Setup (count 9) starts a countdown on its side and cancels
+    the one on the other side. A Buy (Sell) Countdown bar closes at or below
+    (above) the low (high) 2 bars earlier, the countdown completes at 13 and
+    is cancelled when the close crosses the TDST level of its setup.
+
+    Parameters:
+    -----------
+    high, low, close : numpy.ndarray of float64
+        Price data
+    buy_setup, sell_setup : numpy.ndarray of int64
+        Setup counts from td_seq_kernel
+    new_buy_tdst, new_sell_tdst : numpy.ndarray of float64
+        TDST level of the setup completing on each bar
+    buy_qualifier, sell_qualifier : numpy.ndarray of bool
+        Bars that qualify as Buy (Sell) Countdown bars
+    buy_countdown, sell_countdown : numpy.ndarray of int64
+        Output arrays, filled with the countdown counts
+    buy_countdown_active, sell_countdown_active : numpy.ndarray of int64
+        Output arrays, set to 1 on bars with an active countdown
+    buy_bar_8_idx, sell_bar_8_idx : numpy.ndarray of int64
+        Output arrays, set to the position of countdown bar 8 on completion
+        bars, -1 elsewhere
+    buy_completion_stop, sell_completion_stop : numpy.ndarray of float64
+        Output arrays, set to the countdown stop level on completion bars,
+        NaN elsewhere
+    """
+    # Positions of the qualifying bars of the current countdowns
+    buy_bars = np.empty(13, dtype=np.int64)
+    sell_bars = np.empty(13, dtype=np.int64)
+    n_buy = 0
+    n_sell = 0
+
+    buy_active = False
+    sell_active = False
+
+    # TDST levels of the setups that started the countdowns, NaN never cancels
+    buy_tdst_level = np.nan
+    sell_tdst_level = np.nan
+
+    # Setup completions, the only bars where an idle state machine changes
+    completions = np.flatnonzero((buy_setup == 9) | (sell_setup == 9))
+    next_completion = 0
+
+    i = 8
+    while True:
+        i += 1
+
+        # Without an active countdown nothing happens until the next setup
+        # completes, so jump straight to it
+        if not buy_active and not sell_active:
+            while (
+                next_completion < completions.shape[0]
+                and completions[next_completion] < i
+            ):
+                next_completion += 1
+            if next_completion == completions.shape[0]:
+                break
+            i = completions[next_completion]
+
+        if i >= close.shape[0]:
+            break
+
+        # Process buy side setup completion
+        if buy_setup[i] == 9:
+            # Only reset if not already active
+            if not buy_active:
+                buy_active = True
+                n_buy = 0
+                buy_countdown_active[i] = 1
+
+            # If sell countdown is active, reset it
+            if sell_active:
+                sell_active = False
+                n_sell = 0
+                sell_tdst_level = np.nan
+                sell_countdown_active[i] = 0
+                sell_countdown[i] = 0
+
+            # TDST level for buy countdown (highest high of the buy setup)
+            buy_tdst_level = new_buy_tdst[i]
+
+        # Process sell side setup completion
+        if sell_setup[i] == 9:
+            # Only reset if not already active
+            if not sell_active:
+                sell_active = True
+                n_sell = 0
+                sell_countdown_active[i] = 1
+
+            # If buy countdown is active, reset it
+            if buy_active:
+                buy_active = False
+                n_buy = 0
+                buy_tdst_level = np.nan
+                buy_countdown_active[i] = 0
+                buy_countdown[i] = 0
+
+            # TDST level for sell countdown (lowest low of the sell setup)
+            sell_tdst_level = new_sell_tdst[i]
+
+        # Process Buy Countdown
+        if buy_active:
+            buy_countdown_active[i] = 1
+
+            # Cancel the countdown when the close is above TDST. This also
+            # skips the sell countdown of the bar, as the original loop did
+            if close[i] > buy_tdst_level:
+                buy_active = False
+                n_buy = 0
+                buy_countdown[i] = 0
+                continue
+
+            # Qualifying bar: Close <= Low of 2 bars earlier
+            if buy_qualifier[i]:
+                buy_bars[n_buy] = i
+                n_buy += 1
+                buy_countdown[i] = n_buy
+
+                # Countdown completes at 13
+                if n_buy == 13:
+                    buy_bar_8_idx[i] = buy_bars[7]
+                    buy_completion_stop[i] = stop_level(
+                        high, low, buy_bars, -1
+                    )
+                    buy_active = False
+            elif n_buy > 0:
+                # Bar doesn't qualify, keep the previous countdown value
+                buy_countdown[i] = n_buy
+
+        # Process Sell Countdown
+        if sell_active:
+            sell_countdown_active[i] = 1
+
+            # Cancel the countdown when the close is below TDST
+            if close[i] < sell_tdst_level:
+                sell_active = False
+                n_sell = 0
+                sell_countdown[i] = 0
+                continue
+
+            # Qualifying bar: Close >= High of 2 bars earlier
+            if sell_qualifier[i]:
+                sell_bars[n_sell] = i
+                n_sell += 1
+                sell_countdown[i] = n_sell
+
+                # Countdown completes at 13
+                if n_sell == 13:
+                    sell_bar_8_idx[i] = sell_bars[7]
+                    sell_completion_stop[i] = stop_level(
+                        high, low, sell_bars, 1
+                    )
+                    sell_active = False
+            elif n_sell > 0:
+                # Bar doesn't qualify, keep the previous countdown value
+                sell_countdown[i] = n_sell
+
+
+td_countdown_kernel = njit(TD_COUNTDOWN_SIG, cache=True)(_td_countdown_kernel)
+
+
+def _tdst_stop_kernel(
+    high,
+    low,
+    close,
+    buy_setup,
+    sell_setup,
+    new_buy_tdst,
+    new_sell_tdst,
+    new_buy_stop,
+    new_sell_stop,
+    buy_tdst_level,
+    sell_tdst_level,
+    buy_tdst_active,
+    sell_tdst_active,
+    buy_setup_stop,
+    sell_setup_stop,
+    buy_setup_stop_active,
+    sell_setup_stop_active,
+):
+    """
+    Set TDST levels and setup stop levels in place when setups complete.
+
+    A TDST level is cancelled when the close crosses it. A setup stop level
+    is triggered when the bar's low (high) reaches it and reactivated when a
+    later bar trades back beyond it.
+
+    Parameters:
+    -----------
+    high, low, close : numpy.ndarray of float64
+        Price data
+    buy_setup, sell_setup : numpy.ndarray of int64
+        Setup counts from td_seq_kernel
+    new_buy_tdst, new_sell_tdst, new_buy_stop, new_sell_stop :
+    numpy.ndarray of float64
+        TDST and stop levels of the setup completing on each bar
+    buy_tdst_level, sell_tdst_level : numpy.ndarray of float64
+        Output arrays, TDST level on setup completion bars
+    buy_tdst_active, sell_tdst_active : numpy.ndarray of bool
+        Output arrays, TDST activation and cancellation bars
+    buy_setup_stop, sell_setup_stop : numpy.ndarray of float64
+        Output arrays, stop level on setup completion and reactivation bars
+    buy_setup_stop_active, sell_setup_stop_active : numpy.ndarray of bool
+        Output arrays, stop activation and trigger bars
+    """
+    # Current levels, NaN when there is none (comparisons with NaN are False)
+    current_buy_tdst = np.nan
+    current_sell_tdst = np.nan
+    current_buy_stop = np.nan
+    current_sell_stop = np.nan
+
+    # Triggered stop levels for potential reactivation
+    inactive_buy_stop = np.nan
+    inactive_sell_stop = np.nan
+    buy_stop_triggered = False
+    sell_stop_triggered = False
+
+    for i in range(1, close.shape[0]):
+        # Check for TDST cancellation conditions before processing new setups
+        if close[i] > current_buy_tdst:
+            current_buy_tdst = np.nan
+            buy_tdst_active[i] = False
+
+        if close[i] < current_sell_tdst:
+            current_sell_tdst = np.nan
+            sell_tdst_active[i] = False
+
+        # Check for stop loss cancellation conditions
+        if low[i] <= current_buy_stop:
+            inactive_buy_stop = current_buy_stop
+            current_buy_stop = np.nan
+            buy_setup_stop_active[i] = False
+            buy_stop_triggered = True
+
+        if high[i] >= current_sell_stop:
+            inactive_sell_stop = current_sell_stop
+            current_sell_stop = np.nan
+            sell_setup_stop_active[i] = False
+            sell_stop_triggered = True
+
+        # Check for stop loss reactivation conditions
+        if buy_stop_triggered and low[i] > inactive_buy_stop:
+            current_buy_stop = inactive_buy_stop
+            buy_setup_stop[i] = current_buy_stop
+            buy_setup_stop_active[i] = True
+            inactive_buy_stop = np.nan
+            buy_stop_triggered = False
+
+        if sell_stop_triggered and high[i] < inactive_sell_stop:
+            current_sell_stop = inactive_sell_stop
+            sell_setup_stop[i] = current_sell_stop
+            sell_setup_stop_active[i] = True
+            inactive_sell_stop = np.nan
+            sell_stop_triggered = False
+
+        # Calculate new levels when setup completes
+        if buy_setup[i] == 9:
+            current_buy_tdst = new_buy_tdst[i]
+            buy_tdst_level[i] = current_buy_tdst
+            buy_tdst_active[i] = True
+
+            current_buy_stop = new_buy_stop[i]
+            buy_setup_stop[i] = current_buy_stop
+            buy_setup_stop_active[i] = True
+
+            # Reset inactive stops and trigger flags when new setup completes
+            inactive_buy_stop = np.nan
+            buy_stop_triggered = False
+
+        if sell_setup[i] == 9:
+            current_sell_tdst = new_sell_tdst[i]
+            sell_tdst_level[i] = current_sell_tdst
+            sell_tdst_active[i] = True
+
+            current_sell_stop = new_sell_stop[i]
+            sell_setup_stop[i] = current_sell_stop
+            sell_setup_stop_active[i] = True
+
+            # Reset inactive stops and trigger flags when new setup completes
+            inactive_sell_stop = np.nan
+            sell_stop_triggered = False
+
+
+tdst_stop_kernel = njit(TDST_STOP_SIG, cache=True)(_tdst_stop_kernel)
+
+
+def _forward_fill_kernel(
+    high,
+    low,
+    close,
+    buy_tdst_level,
+    sell_tdst_level,
+    buy_tdst_active,
+    sell_tdst_active,
+    buy_setup_stop,
+    sell_setup_stop,
+    buy_setup_stop_active,
+    sell_setup_stop_active,
+    buy_countdown_stop,
+    sell_countdown_stop,
+    buy_countdown_stop_active,
+    sell_countdown_stop_active,
+    buy_countdown_stop_reactivated,
+    sell_countdown_stop_reactivated,
+):
+    """
+    Forward fill TDST levels and stop levels in place until cancellation or
+    a new level, reactivating triggered stop levels.
+
+    Parameters:
+    -----------
+    high, low, close : numpy.ndarray of float64
+        Price data
+    buy_tdst_level, sell_tdst_level, buy_setup_stop, sell_setup_stop,
+    buy_countdown_stop, sell_countdown_stop : numpy.ndarray of float64
+        Levels set on their starting bars, forward filled in place
+    buy_tdst_active, sell_tdst_active, buy_setup_stop_active,
+    sell_setup_stop_active, buy_countdown_stop_active,
+    sell_countdown_stop_active : numpy.ndarray of bool
+        Level activation flags, updated in place
+    buy_countdown_stop_reactivated, sell_countdown_stop_reactivated :
+    numpy.ndarray of bool
+        Output arrays, set on countdown stop reactivation bars
+    """
+    active_buy_tdst = False
+    active_sell_tdst = False
+    active_buy_stop = False
+    active_sell_stop = False
+    active_buy_countdown_stop = False
+    active_sell_countdown_stop = False
+
+    last_buy_tdst = np.nan
+    last_sell_tdst = np.nan
+    last_buy_stop = np.nan
+    last_sell_stop = np.nan
+    last_buy_countdown_stop = np.nan
+    last_sell_countdown_stop = np.nan
+
+    # Triggered stop levels for potential reactivation
+    inactive_buy_stop = np.nan
+    inactive_sell_stop = np.nan
+    inactive_buy_countdown_stop = np.nan
+    inactive_sell_countdown_stop = np.nan
+
+    buy_stop_triggered = False
+    sell_stop_triggered = False
+    buy_countdown_stop_triggered = False
+    sell_countdown_stop_triggered = False
+
+    for i in range(close.shape[0]):
+        # Check for new TDST levels
+        if not np.isnan(buy_tdst_level[i]):
+            active_buy_tdst = True
+            last_buy_tdst = buy_tdst_level[i]
+
+        if not np.isnan(buy_setup_stop[i]):
+            active_buy_stop = True
+            last_buy_stop = buy_setup_stop[i]
+            # Reset reactivation data when new stop is set
+            inactive_buy_stop = np.nan
+            buy_stop_triggered = False
+
+        if not np.isnan(sell_tdst_level[i]):
+            active_sell_tdst = True
+            last_sell_tdst = sell_tdst_level[i]
+
+        if not np.isnan(sell_setup_stop[i]):
+            active_sell_stop = True
+            last_sell_stop = sell_setup_stop[i]
+            # Reset reactivation data when new stop is set
+            inactive_sell_stop = np.nan
+            sell_stop_triggered = False
+
+        # Check for new countdown stop levels
+        if not np.isnan(buy_countdown_stop[i]):
+            active_buy_countdown_stop = True
+            last_buy_countdown_stop = buy_countdown_stop[i]
+            # Reset reactivation data when new stop is set
+            inactive_buy_countdown_stop = np.nan
+            buy_countdown_stop_triggered = False
+
+        if not np.isnan(sell_countdown_stop[i]):
+            active_sell_countdown_stop = True
+            last_sell_countdown_stop = sell_countdown_stop[i]
+            # Reset reactivation data when new stop is set
+            inactive_sell_countdown_stop = np.nan
+            sell_countdown_stop_triggered = False
+
+        # Handle TDST cancellations
+        if active_buy_tdst and close[i] > last_buy_tdst:
+            active_buy_tdst = False
+            buy_tdst_active[i] = False
+
+        if active_sell_tdst and close[i] < last_sell_tdst:
+            active_sell_tdst = False
+            sell_tdst_active[i] = False
+
+        # Handle setup stop loss cancellations
+        if active_buy_stop and low[i] <= last_buy_stop:
+            active_buy_stop = False
+            buy_setup_stop_active[i] = False
+            inactive_buy_stop = last_buy_stop
+            buy_stop_triggered = True
+
+        if active_sell_stop and high[i] >= last_sell_stop:
+            active_sell_stop = False
+            sell_setup_stop_active[i] = False
+            inactive_sell_stop = last_sell_stop
+            sell_stop_triggered = True
+
+        # Handle countdown stop loss cancellations
+        if active_buy_countdown_stop and low[i] <= last_buy_countdown_stop:
+            active_buy_countdown_stop = False
+            buy_countdown_stop_active[i] = False
+            inactive_buy_countdown_stop = last_buy_countdown_stop
+            buy_countdown_stop_triggered = True
+
+        if active_sell_countdown_stop and high[i] >= last_sell_countdown_stop:
+            active_sell_countdown_stop = False
+            sell_countdown_stop_active[i] = False
+            inactive_sell_countdown_stop = last_sell_countdown_stop
+            sell_countdown_stop_triggered = True
+
+        # Handle setup stop loss reactivation
+        if buy_stop_triggered and low[i] > inactive_buy_stop:
+            active_buy_stop = True
+            last_buy_stop = inactive_buy_stop
+            buy_setup_stop[i] = last_buy_stop
+            buy_setup_stop_active[i] = True
+            inactive_buy_stop = np.nan
+            buy_stop_triggered = False
+
+        if sell_stop_triggered and high[i] < inactive_sell_stop:
+            active_sell_stop = True
+            last_sell_stop = inactive_sell_stop
+            sell_setup_stop[i] = last_sell_stop
+            sell_setup_stop_active[i] = True
+            inactive_sell_stop = np.nan
+            sell_stop_triggered = False
+
+        # Handle countdown stop loss reactivation
+        if buy_countdown_stop_triggered and low[i] > inactive_buy_countdown_stop:
+            active_buy_countdown_stop = True
+            last_buy_countdown_stop = inactive_buy_countdown_stop
+            buy_countdown_stop[i] = last_buy_countdown_stop
+            buy_countdown_stop_active[i] = True
+            buy_countdown_stop_reactivated[i] = True
+            inactive_buy_countdown_stop = np.nan
+            buy_countdown_stop_triggered = False
+
+        if sell_countdown_stop_triggered and high[i] < inactive_sell_countdown_stop:
+            active_sell_countdown_stop = True
+            last_sell_countdown_stop = inactive_sell_countdown_stop
+            sell_countdown_stop[i] = last_sell_countdown_stop
+            sell_countdown_stop_active[i] = True
+            sell_countdown_stop_reactivated[i] = True
+            inactive_sell_countdown_stop = np.nan
+            sell_countdown_stop_triggered = False
+
+        # Forward fill active TDST levels
+        if active_buy_tdst:
+            buy_tdst_level[i] = last_buy_tdst
+            buy_tdst_active[i] = True
+
+        if active_sell_tdst:
+            sell_tdst_level[i] = last_sell_tdst
+            sell_tdst_active[i] = True
+
+        # Forward fill active setup stop levels
+        if active_buy_stop:
+            buy_setup_stop[i] = last_buy_stop
+            buy_setup_stop_active[i] = True
+
+        if active_sell_stop:
+            sell_setup_stop[i] = last_sell_stop
+            sell_setup_stop_active[i] = True
+
+        # Forward fill active countdown stop levels
+        if active_buy_countdown_stop:
+            buy_countdown_stop[i] = last_buy_countdown_stop
+            buy_countdown_stop_active[i] = True
+
+        if active_sell_countdown_stop:
+            sell_countdown_stop[i] = last_sell_countdown_stop
+            sell_countdown_stop_active[i] = True
+
+
+forward_fill_kernel = njit(FORWARD_FILL_SIG, cache=True)(_forward_fill_kernel)
+
+
+def _countdown_stop_kernel(
+    high,
+    low,
+    buy_completion_stop,
+    sell_completion_stop,
+    buy_countdown_stop,
+    sell_countdown_stop,
+    buy_countdown_stop_active,
+    sell_countdown_stop_active,
+    buy_countdown_stop_triggered,
+    sell_countdown_stop_triggered,
+    buy_countdown_stop_reactivated,
+    sell_countdown_stop_reactivated,
+):
+    """
+    Apply countdown stop levels in place from each countdown completion
+    until the next one, tracking their triggers and reactivations.
+
+    Parameters:
+    -----------
+    high, low : numpy.ndarray of float64
+        Price data
+    buy_completion_stop, sell_completion_stop : numpy.ndarray of float64
+        Stop levels on completion bars from td_countdown_kernel
+    buy_countdown_stop, sell_countdown_stop : numpy.ndarray of float64
+        Output arrays, filled with the stop levels
+    buy_countdown_stop_active, sell_countdown_stop_active,
+    buy_countdown_stop_triggered, sell_countdown_stop_triggered,
+    buy_countdown_stop_reactivated, sell_countdown_stop_reactivated :
+    numpy.ndarray of bool
+        Output arrays, stop state flags
+    """
+    n = high.shape[0]
+
+    for completion_idx in range(n):
+        buy_stop = buy_completion_stop[completion_idx]
+        if np.isnan(buy_stop):
+            continue
+
+        # Track stop level state through time
+        active = True
+        triggered = False
+
+        # Apply from completion point forward
+        for i in range(completion_idx, n):
+            # Check for stop level breach (deactivation)
+            if active and low[i] <= buy_stop:
+                active = False
+                triggered = True
+                buy_countdown_stop_active[i] = False
+                buy_countdown_stop_triggered[i] = True
+            # Check for reactivation after being triggered
+            elif not active and triggered and low[i] > buy_stop:
+                active = True
+                buy_countdown_stop_active[i] = True
+                buy_countdown_stop_reactivated[i] = True
+                triggered = False
+
+            # Set the stop level regardless of active state
+            buy_countdown_stop[i] = buy_stop
+
+            if active:
+                buy_countdown_stop_active[i] = True
+
+            # Stop when we reach another buy completion
+            if i > completion_idx and not np.isnan(buy_completion_stop[i]):
+                break
+
+    for completion_idx in range(n):
+        sell_stop = sell_completion_stop[completion_idx]
+        if np.isnan(sell_stop):
+            continue
+
+        # Track stop level state through time
+        active = True
+        triggered = False
+
+        # Apply from completion point forward
+        for i in range(completion_idx, n):
+            # Check for stop level breach (deactivation)
+            if active and high[i] >= sell_stop:
+                active = False
+                triggered = True
+                sell_countdown_stop_active[i] = False
+                sell_countdown_stop_triggered[i] = True
+            # Check for reactivation after being triggered
+            elif not active and triggered and high[i] < sell_stop:
+                active = True
+                sell_countdown_stop_active[i] = True
+                sell_countdown_stop_reactivated[i] = True
+                triggered = False
+
+            # Set the stop level regardless of active state
+            sell_countdown_stop[i] = sell_stop
+
+            if active:
+                sell_countdown_stop_active[i] = True
+
+            # Stop when we reach another sell completion
+            if i > completion_idx and not np.isnan(sell_completion_stop[i]):
+                break
+
+
+countdown_stop_kernel = njit(COUNTDOWN_STOP_SIG, cache=True)(_countdown_stop_kernel)